@@ -29,6 +29,35 @@ class Settings:
             os.environ.get("CACHE_ROOT", cfg.get("cache_root", _PROJECT_ROOT / ".cache"))
         )
 
+        # Fork Python runs from a warm interpreter instead of starting a new
+        # one per run. Override via config.yaml python_zygote key.
+        self.python_zygote: bool = bool(cfg.get("python_zygote", True))
+
+        # Address-space limit for the worker processes that run interactive
+        # judges. Override via config.yaml judge_memory_mb key.
+        self.judge_memory_bytes: int = (
+            int(cfg.get("judge_memory_mb", 1024)) * 1024 * 1024
+        )
+
+        # Number of most recent lines kept in a recorded interaction
+        # transcript. Override via config.yaml transcript_max_lines key.
+        self.transcript_max_lines: int = int(cfg.get("transcript_max_lines", 100_000))
+
+        # Pin every solution run to a dedicated core from a shared pool,
+        # leaving the first reserved_cores cores to the API server.
+        # Override via config.yaml pin_cores / reserved_cores keys.
+        self.pin_cores: bool = bool(cfg.get("pin_cores", False))
+        self.reserved_cores: int = int(cfg.get("reserved_cores", 1))
+
+        # Verdicts whose time is within this fraction of the time limit (on
+        # either side) are flagged as borderline, and borderline AC/TLE
+        # verdicts are re-run borderline_reruns more times, keeping the
+        # "min" or "median" attempt. Override via config.yaml
+        # borderline_margin / borderline_reruns / borderline_aggregate keys.
+        self.borderline_margin: float = float(cfg.get("borderline_margin", 0.1))
+        self.borderline_reruns: int = int(cfg.get("borderline_reruns", 2))
+        self.borderline_aggregate: str = str(cfg.get("borderline_aggregate", "min"))
+
         # Port the uvicorn server listens on.
         # Override via PORT env var or config.yaml port key.
         self.port: int = int(os.environ.get("PORT", cfg.get("port", 8001)))
@@ -52,6 +81,21 @@ class Settings:
         else:
             self.cpp_flags = _default_cpp_flags
 
+        # Size cap for the compiled C++ binary cache, precompiled headers
+        # included; least recently used entries are evicted beyond it.
+        # Override via config.yaml cpp_cache_max_mb key.
+        self.cpp_cache_max_bytes: int = (
+            int(cfg.get("cpp_cache_max_mb", 512)) * 1024 * 1024
+        )
+
+        # Compile sources that include <bits/stdc++.h> against a precompiled
+        # copy of the header. Override via config.yaml cpp_pch key.
+        self.cpp_pch: bool = bool(cfg.get("cpp_pch", True))
+
+        # Route compiles through ccache (if installed), with its object cache
+        # kept under cache_root. Override via config.yaml cpp_ccache key.
+        self.cpp_ccache: bool = bool(cfg.get("cpp_ccache", False))
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,214 @@
+"""
+Suggest a time limit from measured solution times.
+
+Every solution expected to be AC is run ``repeats`` times on every test, and
+every solution expected to be TLE is run on each test until one times out.
+Repeats are interleaved (each round visits every test and solution once), so
+a burst of machine load spreads across solutions instead of skewing one of
+them, and runs are pinned to a single core: one borrowed from the shared
+core pool when pinning is on, otherwise the last available core.
+
+The suggested limit is the slowest AC case (median over repeats) times the
+safety factor, rounded up to the requested granularity, provided it still
+fails every TLE solution.
+"""
+
+import logging
+import math
+import os
+import statistics
+import time
+from pathlib import Path
+
+from api.collection.problems import get_problem, patch_problem_config
+from api.collection.solutions import get_solutions
+from api.collection.test_sets import get_test_sets
+from api.execution.cores import dedicated_core
+from api.execution.run_testcase import compile_solutions, run_individual_testcase
+from api.jobs import update_job
+from api.models.problem import (
+    CalibrateTimeLimitRequest,
+    SolutionTiming,
+    TimeLimitCalibration,
+)
+
+_FLUSH_INTERVAL = 0.5
+
+
+def _calibration_cpu() -> int | None:
+    """A core to pin runs to when there is no core pool, leaving the first
+    one for everything else."""
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    cpus = sorted(os.sched_getaffinity(0))
+    return cpus[-1] if len(cpus) > 1 else None
+
+
+def _round_up(seconds: float, granularity: float) -> float:
+    return round(math.ceil(seconds / granularity - 1e-9) * granularity, 6)
+
+
+def _round_below(seconds: float, granularity: float) -> float:
+    """Largest multiple of *granularity* strictly below *seconds*."""
+    return round((math.ceil(seconds / granularity - 1e-9) - 1) * granularity, 6)
+
+
+def calibrate_time_limit_job(
+    problem_path: Path, problem_slug: str, req: CalibrateTimeLimitRequest, job_id: str
+) -> None:
+    """
+    Background task: measure AC and TLE solutions and store a
+    TimeLimitCalibration as the job result, reporting progress as
+    {"done": int, "total": int} while running.
+    """
+    try:
+        update_job(job_id, status="running")
+
+        problem = get_problem(problem_path.parent, problem_slug)
+        # Measure with a generous limit so times are not cut off at the
+        # current one.
+        probe = problem.model_copy(deep=True)
+        probe.config.limits.time = req.max_time
+
+        solutions = get_solutions(problem_path)
+        ac = [s for s in solutions if s.expectation_overall() == "AC"]
+        tle = [s for s in solutions if s.expectation_overall() == "TLE"]
+        if not ac:
+            raise ValueError("No solution is expected to be AC")
+
+        cases = [tc for ts in get_test_sets(problem_path) for tc in ts.test_cases]
+        if not cases:
+            raise ValueError("The problem has no test cases to measure")
+
+        failed = [c for c in compile_solutions(problem_path, ac + tle) if not c.success]
+        if failed:
+            raise ValueError(
+                f"{failed[0].source} failed to compile:\n{failed[0].error}"
+            )
+
+        total = req.repeats * len(cases) * len(ac) + len(cases) * len(tle)
+        done = 0
+        last_flush = time.monotonic()
+
+        def _progress():
+            nonlocal last_flush
+            now = time.monotonic()
+            if now - last_flush >= _FLUSH_INTERVAL:
+                update_job(job_id, result={"done": done, "total": total})
+                last_flush = now
+
+        # solution path → case name → measured times
+        times: dict[str, dict[str, list[float]]] = {s.path: {} for s in ac + tle}
+        unexpected: dict[str, list[str]] = {s.path: [] for s in ac + tle}
+
+        with dedicated_core() as affinity:
+            if affinity is None:
+                cpu = _calibration_cpu()
+                affinity = {cpu} if cpu is not None else None
+            cpu = min(affinity) if affinity else None
+
+            for repeat in range(req.repeats):
+                for test_case in cases:
+                    name = f"{test_case.set_name}/{test_case.name}"
+                    for solution in ac:
+                        verdict = run_individual_testcase(
+                            problem_path,
+                            probe,
+                            solution,
+                            test_case,
+                            cpu_affinity=affinity,
+                        )
+                        runs = times[solution.path].setdefault(name, [])
+                        runs.append(verdict.time_ms)
+                        if repeat == 0 and verdict.verdict != "AC":
+                            unexpected[solution.path].append(
+                                f"{name}: {verdict.verdict}"
+                            )
+                        done += 1
+                        _progress()
+
+            for count, solution in enumerate(tle, start=1):
+                for test_case in cases:
+                    name = f"{test_case.set_name}/{test_case.name}"
+                    verdict = run_individual_testcase(
+                        problem_path, probe, solution, test_case, cpu_affinity=affinity
+                    )
+                    times[solution.path][name] = [verdict.time_ms]
+                    done += 1
+                    _progress()
+                    if verdict.verdict == "TLE":
+                        break
+                    if verdict.verdict != "AC":
+                        unexpected[solution.path].append(f"{name}: {verdict.verdict}")
+                # Cases skipped after a timeout count as done
+                done = req.repeats * len(cases) * len(ac) + len(cases) * count
+
+        timings = []
+        for solution in ac + tle:
+            per_case = {
+                name: statistics.median(runs)
+                for name, runs in times[solution.path].items()
+            }
+            slowest = max(per_case, key=per_case.get)
+            timings.append(
+                SolutionTiming(
+                    solution_path=solution.path,
+                    expectation=solution.expectation_overall(),
+                    runs=sum(len(runs) for runs in times[solution.path].values()),
+                    max_ms=per_case[slowest],
+                    slowest_case=slowest,
+                    unexpected=unexpected[solution.path],
+                )
+            )
+
+        ac_max = max(t.max_ms for t in timings if t.expectation == "AC")
+        tle_timings = [t for t in timings if t.expectation == "TLE"]
+        tle_min = min((t.max_ms for t in tle_timings), default=None)
+
+        warnings = []
+        suggested = _round_up(ac_max * req.safety_factor / 1000, req.granularity)
+        if tle_min is not None and suggested * 1000 >= tle_min:
+            fastest = min(tle_timings, key=lambda t: t.max_ms)
+            below = _round_below(tle_min / 1000, req.granularity)
+            if below * 1000 > ac_max:
+                warnings.append(
+                    f"A safety factor of {req.safety_factor} would let "
+                    f"{fastest.solution_path} pass; lowered the limit to fail it"
+                )
+                suggested = below
+            else:
+                warnings.append(
+                    f"{fastest.solution_path} is not slower than the AC solutions "
+                    f"({tle_min:.0f} ms vs {ac_max:.0f} ms); no limit separates them"
+                )
+                suggested = None
+            if tle_min >= req.max_time * 1000:
+                warnings.append(
+                    f"TLE solutions were only measured up to max_time={req.max_time}s"
+                )
+
+        applied = False
+        if req.apply and suggested is not None:
+            limits = problem.config.limits.model_dump() | {"time": suggested}
+            patch_problem_config(problem_path.parent, problem_slug, limits=limits)
+            applied = True
+
+        calibration = TimeLimitCalibration(
+            current_limit=problem.config.limits.time,
+            suggested_limit=suggested,
+            applied=applied,
+            safety_factor=suggested * 1000 / ac_max if suggested and ac_max else 0,
+            ac_max_ms=ac_max,
+            tle_min_ms=tle_min,
+            cpu=cpu,
+            solutions=timings,
+            warnings=warnings,
+        )
+        update_job(job_id, status="done", result=calibration.model_dump())
+
+    except Exception as exc:
+        import traceback
+
+        logging.error(traceback.format_exc())
+        update_job(job_id, status="failed", error=str(exc))
+        raise
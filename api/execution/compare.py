@@ -0,0 +1,237 @@
+"""
+Built-in output comparison, used for standard problems without a checker.
+
+Both outputs are consumed as text streams in fixed-size chunks, so neither
+side has to be fully materialised. Comparison modes (see OutputComparison):
+
+* exact — character-for-character, ignoring leading/trailing whitespace
+* token — whitespace-separated tokens must match
+* line  — lines must match, ignoring trailing whitespace and blank lines at EOF
+* float — like token, but numeric tokens match within abs_eps / rel_eps;
+  only plain decimal numbers count (not "1_0", "+5", "nan" or "inf")
+
+On mismatch the result carries a short description of the first difference,
+suitable for Verdict.comment.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from itertools import zip_longest
+from typing import Iterator, TextIO
+
+from api.models.problem import OutputComparison
+
+_CHUNK_SIZE = 1 << 16  # characters read per chunk
+_SNIPPET_LEN = 20  # characters of context shown in mismatch comments
+
+_TOKEN_OR_NEWLINE = re.compile(r"\S+|\n")
+# float() also takes "1_0", "+5", non-ASCII digits, "nan" and "inf"
+_FLOAT = re.compile(r"-?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?")
+
+
+@dataclass
+class CompareResult:
+    same: bool
+    comment: str = ""
+
+
+def compare_outputs(
+    process: TextIO, expected: TextIO, config: OutputComparison
+) -> CompareResult:
+    """Compare the solution's output against the expected output stream."""
+    if config.mode == "exact":
+        return _compare_exact(process, expected)
+    elif config.mode == "token":
+        return _compare_tokens(process, expected, None)
+    elif config.mode == "line":
+        return _compare_lines(process, expected)
+    elif config.mode == "float":
+        return _compare_tokens(process, expected, config)
+    raise ValueError(f"Unknown output comparison mode: {config.mode}")
+
+
+# ---------------------------------------------------------------------------
+# Stream helpers
+# ---------------------------------------------------------------------------
+
+
+def _chunks(stream: TextIO) -> Iterator[str]:
+    while True:
+        chunk = stream.read(_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _lstripped_chunks(stream: TextIO) -> Iterator[str]:
+    """Chunks of *stream* with leading whitespace removed."""
+    chunks = _chunks(stream)
+    for chunk in chunks:
+        chunk = chunk.lstrip()
+        if chunk:
+            yield chunk
+            break
+    yield from chunks
+
+
+def _iter_tokens(stream: TextIO) -> Iterator[tuple[str, int, int]]:
+    """Yield (token, line, token_index_on_line), both 1-based."""
+    line, index = 1, 0
+    carry = ""
+    for chunk in _chunks(stream):
+        data = carry + chunk
+        carry = ""
+        for match in _TOKEN_OR_NEWLINE.finditer(data):
+            token = match.group()
+            if token == "\n":
+                line, index = line + 1, 0
+            elif match.end() == len(data):
+                # Token may continue into the next chunk
+                carry = token
+            else:
+                index += 1
+                yield token, line, index
+    if carry:
+        yield carry, line, index + 1
+
+
+def _iter_lines(stream: TextIO) -> Iterator[tuple[str, int]]:
+    """Yield (line, line_number) with trailing whitespace removed and
+    trailing blank lines dropped."""
+    blank_run = 0
+    for number, raw in enumerate(stream, start=1):
+        line = raw.rstrip()
+        if not line:
+            blank_run += 1
+            continue
+        for offset in range(blank_run, 0, -1):
+            yield "", number - offset
+        blank_run = 0
+        yield line, number
+
+
+def _snippet(text: str | None) -> str:
+    if text is None:
+        return "EOF"
+    if len(text) > _SNIPPET_LEN:
+        text = text[:_SNIPPET_LEN] + "..."
+    return repr(text)
+
+
+# ---------------------------------------------------------------------------
+# Modes
+# ---------------------------------------------------------------------------
+
+
+def _compare_exact(process: TextIO, expected: TextIO) -> CompareResult:
+    got_chunks = _lstripped_chunks(process)
+    exp_chunks = _lstripped_chunks(expected)
+    got, exp = "", ""
+    line, col = 1, 1
+
+    while True:
+        if not got:
+            got = next(got_chunks, "")
+        if not exp:
+            exp = next(exp_chunks, "")
+        if not got or not exp:
+            break
+        k = min(len(got), len(exp))
+        if got[:k] == exp[:k]:
+            matched = got[:k]
+        else:
+            i = next(i for i in range(k) if got[i] != exp[i])
+            matched = got[:i]
+        newlines = matched.count("\n")
+        if newlines:
+            line += newlines
+            col = len(matched) - matched.rfind("\n")
+        else:
+            col += len(matched)
+        got, exp = got[len(matched) :], exp[len(matched) :]
+        if len(matched) < k:
+            break
+
+    # Outputs agree up to here; the rest is only allowed to be whitespace.
+    got_blank = _rest_is_blank(got, got_chunks)
+    exp_blank = _rest_is_blank(exp, exp_chunks)
+    if got_blank and exp_blank:
+        return CompareResult(same=True)
+    return CompareResult(
+        same=False,
+        comment=(
+            f"Line {line}, column {col}: expected "
+            f"{_snippet(exp or None)}, got {_snippet(got or None)}"
+        ),
+    )
+
+
+def _rest_is_blank(buffered: str, chunks: Iterator[str]) -> bool:
+    if buffered.strip():
+        return False
+    return all(not chunk.strip() for chunk in chunks)
+
+
+def _compare_tokens(
+    process: TextIO, expected: TextIO, tolerance: OutputComparison | None
+) -> CompareResult:
+    pairs = zip_longest(_iter_tokens(process), _iter_tokens(expected))
+    for count, (got, exp) in enumerate(pairs, start=1):
+        if got is None:
+            _, line, index = exp
+            return CompareResult(
+                same=False,
+                comment=(
+                    f"Output ended early at token {count} "
+                    f"(expected line {line}, token {index}: {_snippet(exp[0])})"
+                ),
+            )
+        if exp is None:
+            _, line, index = got
+            return CompareResult(
+                same=False,
+                comment=(
+                    f"Extra output at line {line}, token {index}: "
+                    f"{_snippet(got[0])}"
+                ),
+            )
+        if got[0] == exp[0]:
+            continue
+        if tolerance is not None and _floats_close(got[0], exp[0], tolerance):
+            continue
+        _, line, index = got
+        return CompareResult(
+            same=False,
+            comment=(
+                f"Line {line}, token {index}: expected {_snippet(exp[0])}, "
+                f"got {_snippet(got[0])}"
+            ),
+        )
+    return CompareResult(same=True)
+
+
+def _floats_close(got: str, exp: str, tolerance: OutputComparison) -> bool:
+    if not (_FLOAT.fullmatch(got) and _FLOAT.fullmatch(exp)):
+        return False
+    a, b = float(got), float(exp)
+    if not (math.isfinite(a) and math.isfinite(b)):
+        return False
+    diff = abs(a - b)
+    return diff <= tolerance.abs_eps or diff <= tolerance.rel_eps * abs(b)
+
+
+def _compare_lines(process: TextIO, expected: TextIO) -> CompareResult:
+    pairs = zip_longest(_iter_lines(process), _iter_lines(expected))
+    for got, exp in pairs:
+        if got is not None and exp is not None and got[0] == exp[0]:
+            continue
+        number = (got or exp)[1]
+        return CompareResult(
+            same=False,
+            comment=(
+                f"Line {number}: expected {_snippet(exp and exp[0])}, "
+                f"got {_snippet(got and got[0])}"
+            ),
+        )
+    return CompareResult(same=True)
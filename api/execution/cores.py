@@ -0,0 +1,67 @@
+"""
+Dedicated CPU cores for timing-sensitive runs.
+
+When Settings.pin_cores is on, solution runs borrow a core from a shared
+pool for their duration and pin their child processes to it, so concurrent
+runs do not compete for the same core. The first Settings.reserved_cores
+cores available to the server are never handed out. Only the judged
+solution's processes are pinned: the API and its helpers (compiles,
+validators, generators) keep the server's whole mask, so they can use every
+core, and the reserved ones are never busy with pinned runs. Borrowers wait
+while every core in the pool is busy, so the pool also caps how many runs
+execute at once.
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+
+from api.config import get_settings
+
+
+class CorePool:
+    """A set of CPU cores handed out one at a time."""
+
+    def __init__(self, cores: list[int]):
+        self.cores = list(cores)
+        self._free = list(reversed(self.cores))
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def core(self):
+        """Borrow a core, yielding it as a cpu_affinity set."""
+        with self._cond:
+            while not self._free:
+                self._cond.wait()
+            core = self._free.pop()
+        try:
+            yield {core}
+        finally:
+            with self._cond:
+                self._free.append(core)
+                self._cond.notify()
+
+
+@lru_cache
+def get_core_pool() -> CorePool | None:
+    """The shared pool, or None if pinning is off or no core can be spared."""
+    settings = get_settings()
+    if not settings.pin_cores or not hasattr(os, "sched_getaffinity"):
+        return None
+    cores = sorted(os.sched_getaffinity(0))[settings.reserved_cores :]
+    return CorePool(cores) if cores else None
+
+
+@contextmanager
+def dedicated_core():
+    """
+    Borrow a core from the shared pool for the duration of the block,
+    yielding the cpu_affinity to run with (None when pinning is off).
+    """
+    pool = get_core_pool()
+    if pool is None:
+        yield None
+        return
+    with pool.core() as cpu_affinity:
+        yield cpu_affinity
@@ -1,13 +1,58 @@
 """
 Utilities for compiling and running a C++ file.
+
+Compiled binaries are cached under ``{cache_root}/cpp_binaries``, keyed on
+the source content, the compile flags and the compiler version. An index
+file records the size of every binary so the cache can be trimmed (least
+recently used first) to ``Settings.cpp_cache_max_bytes``. A binary's mtime is
+its last use: a cache hit only touches the file (at most once a minute), so
+runs do not contend on the index, which is rewritten only when a binary is
+added.
+
+Compilation is single-flight per cache key: concurrent callers in this
+process share one g++ invocation, other processes wait on a per-key file
+lock, and binaries are written to a temporary file and renamed into place.
+Eviction takes the same per-key lock, skips keys that are being compiled,
+and removes a binary's lock file together with it.
+
+Sources that include ``<bits/stdc++.h>`` are compiled against a precompiled
+copy of that header, built once per (compiler, flag set) under
+``{cache_root}/cpp_pch``. These count towards the same cap and are evicted
+with the binaries, least recently used first. If ``Settings.cpp_ccache`` is set and ccache is
+installed, compiles also go through a local object cache.
 """
 
+import fcntl
 import hashlib
+import logging
+import os
+import re
+import shutil
 import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
+import yaml
+
 from api.config import get_settings
-from api.execution.execute_python import RunFileResult
+from api.execution.execute_python import RunFileResult, run_command
+
+_COMPILER = "g++"
+_INDEX_NAME = "index.yaml"
+_LOCK_NAME = ".lock"
+_TOUCH_INTERVAL = 60  # seconds; a hit within this of the last one is not recorded
+
+# cache key → Future of the compile currently running in this process
+_inflight: dict[str, Future] = {}
+_inflight_guard = threading.Lock()
+
+_BITS_INCLUDE = re.compile(rb"^\s*#\s*include\s*<bits/stdc\+\+\.h>", re.MULTILINE)
+_pch_guard = threading.Lock()
+_pch_failed: set[str] = set()  # flag-set keys whose header failed to precompile
 
 
 class CompileError(Exception):
@@ -18,14 +63,267 @@ class CompileError(Exception):
         super().__init__(stderr)
 
 
-def _binary_path(source_path: Path) -> Path:
-    """Deterministic binary path based on source file content + mtime."""
-    stat = source_path.stat()
-    key = f"{source_path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
-    digest = hashlib.sha256(key.encode()).hexdigest()[:16]
+@lru_cache
+def _compiler_version() -> str:
+    """First line of ``g++ --version``; part of every cache key."""
+    result = subprocess.run(
+        [_COMPILER, "--version"], capture_output=True, text=True, timeout=10
+    )
+    return result.stdout.splitlines()[0] if result.stdout else ""
+
+
+def _cache_dir() -> Path:
     cache_dir = get_settings().cache_root / "cpp_binaries"
     cache_dir.mkdir(parents=True, exist_ok=True)
-    return cache_dir / f"{source_path.stem}_{digest}"
+    return cache_dir
+
+
+def _cache_key(source_path: Path, flags: list[str]) -> str:
+    """Digest of source content + compile flags + compiler version."""
+    digest = hashlib.sha256(source_path.read_bytes())
+    digest.update("\0".join(flags).encode())
+    digest.update(_compiler_version().encode())
+    return digest.hexdigest()[:16]
+
+
+def _binary_path(source_path: Path, key: str) -> Path:
+    return _cache_dir() / f"{source_path.stem}_{key}"
+
+
+@contextmanager
+def _file_lock(name: str, *, blocking: bool = True):
+    """
+    Exclusive flock on ``cpp_binaries/{name}``, shared across processes.
+
+    Yields True once the lock is held. If *blocking* is false and another
+    holder has it, yields False instead of waiting. Lock files may be
+    unlinked by their holder (see _evict); a waiter that then gets the lock
+    on the unlinked file starts again on the current one.
+    """
+    path = _cache_dir() / name
+    flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+    while True:
+        with open(path, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, flags)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                if _is_current(lock_file, path):
+                    yield True
+                    return
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _is_current(lock_file, path: Path) -> bool:
+    """Whether the open *lock_file* is still the file at *path*."""
+    try:
+        return os.stat(path).st_ino == os.fstat(lock_file.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+def _read_index() -> dict[str, dict]:
+    path = _cache_dir() / _INDEX_NAME
+    if not path.exists():
+        return {}
+    try:
+        return yaml.safe_load(path.read_text()) or {}
+    except yaml.YAMLError:
+        logging.warning("%s is unreadable; rebuilding it from the cache", path)
+        return {
+            entry.name: {"source": "", "size": entry.stat().st_size}
+            for entry in _cache_dir().iterdir()
+            if entry.name != _INDEX_NAME
+            and not entry.name.startswith(".")
+            and not entry.name.endswith(".lock")
+        }
+
+
+def _write_index(index: dict[str, dict]) -> None:
+    """Replace the index atomically, so a crash cannot leave it half written."""
+    path = _cache_dir() / _INDEX_NAME
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_text(yaml.safe_dump(index, default_flow_style=False))
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _last_used(name: str) -> float:
+    try:
+        return (_cache_dir() / name).stat().st_mtime
+    except FileNotFoundError:
+        return 0.0  # already gone; dropped first
+
+
+def _pch_root() -> Path:
+    return get_settings().cache_root / "cpp_pch"
+
+
+def _pch_entries() -> list[tuple[float, str, int]]:
+    """(last use, key, size) of every precompiled header directory."""
+    entries = []
+    root = _pch_root()
+    for pch_dir in root.iterdir() if root.is_dir() else []:
+        size, used = 0, 0.0
+        for path in pch_dir.rglob("*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # removed by another process meanwhile
+            if path.is_file():
+                size += stat.st_size
+            if path.name == "stdc++.h.gch":
+                used = stat.st_mtime
+        entries.append((used, pch_dir.name, size))
+    return entries
+
+
+def _evict(index: dict[str, dict], keep: str) -> None:
+    """
+    Remove least recently used binaries and precompiled headers until the
+    cache fits its cap. Entries whose lock is held (being built) are skipped.
+    """
+    max_bytes = get_settings().cpp_cache_max_bytes
+    binaries = [(_last_used(name), name, e["size"]) for name, e in index.items()]
+    pchs = _pch_entries()
+    total = sum(size for _, _, size in binaries + pchs)
+    by_age = sorted([(*b, False) for b in binaries] + [(*p, True) for p in pchs])
+    for _, name, size, is_pch in by_age:
+        if total <= max_bytes:
+            break
+        if name == keep:
+            continue
+        lock_name = f"pch_{name}.lock" if is_pch else f"{name}.lock"
+        with _file_lock(lock_name, blocking=False) as locked:
+            if not locked:
+                continue  # being built right now
+            if is_pch:
+                shutil.rmtree(_pch_root() / name, ignore_errors=True)
+            else:
+                (_cache_dir() / name).unlink(missing_ok=True)
+                del index[name]
+            (_cache_dir() / lock_name).unlink(missing_ok=True)
+        total -= size
+
+
+def _touch(binary: Path) -> bool:
+    """
+    Record a cache hit on *binary* by bumping its mtime, unless that was
+    done within _TOUCH_INTERVAL. Returns False if *binary* has been evicted.
+    """
+    try:
+        if time.time() - binary.stat().st_mtime >= _TOUCH_INTERVAL:
+            os.utime(binary)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _record_use(binary: Path, source_path: Path) -> bool:
+    """
+    Add a freshly compiled *binary* to the index and trim the cache. Returns
+    False if *binary* has been evicted in the meantime.
+    """
+    with _file_lock(_LOCK_NAME):
+        index = _read_index()
+        try:
+            size = binary.stat().st_size
+        except FileNotFoundError:
+            return False
+        index[binary.name] = {"source": str(source_path.resolve()), "size": size}
+        _evict(index, keep=binary.name)
+        _write_index(index)
+    return True
+
+
+def _precompiled_header_dir(flags: list[str]) -> Path | None:
+    """
+    Return an include directory holding ``bits/stdc++.h.gch`` built with
+    *flags*, building it on first use. Returns None if it cannot be built.
+
+    GCC looks for ``<header>.gch`` in each include directory before the
+    header itself, so adding this directory with -I is enough for
+    ``#include <bits/stdc++.h>`` to pick up the precompiled copy.
+    """
+    digest = hashlib.sha256("\0".join(flags).encode())
+    digest.update(_compiler_version().encode())
+    key = digest.hexdigest()[:16]
+    if key in _pch_failed:
+        return None
+
+    pch_dir = _pch_root() / key
+    gch = pch_dir / "bits" / "stdc++.h.gch"
+    if _touch(gch):
+        return pch_dir
+
+    with _pch_guard, _file_lock(f"pch_{key}.lock"):
+        if gch.exists():
+            return pch_dir
+        gch.parent.mkdir(parents=True, exist_ok=True)
+        header = pch_dir / "stdcxx_pch.h"
+        header.write_text("#include <bits/stdc++.h>\n")
+        tmp = gch.with_name(f".{gch.name}.{os.getpid()}.tmp")
+        try:
+            result = subprocess.run(
+                [_COMPILER, *flags, "-x", "c++-header", str(header), "-o", str(tmp)],
+                capture_output=True,
+                text=True,
+                timeout=120,
+            )
+            if result.returncode != 0:
+                logging.warning("Precompiling bits/stdc++.h failed:\n%s", result.stderr)
+                _pch_failed.add(key)
+                return None
+            os.replace(tmp, gch)
+        finally:
+            tmp.unlink(missing_ok=True)
+    return pch_dir
+
+
+def _compiler_command(source_path: Path, flags: list[str]) -> tuple[list[str], dict]:
+    """Build the g++ command line (minus -o) and its environment."""
+    settings = get_settings()
+    cmd = [_COMPILER, *flags]
+    pch_dir = None
+    if settings.cpp_pch and _BITS_INCLUDE.search(source_path.read_bytes()):
+        pch_dir = _precompiled_header_dir(flags)
+        if pch_dir is not None:
+            cmd += ["-I", str(pch_dir)]
+
+    env = os.environ.copy()
+    if settings.cpp_ccache and shutil.which("ccache"):
+        if pch_dir is not None:
+            # ccache cannot cache a compile that uses a precompiled header
+            # unless the preprocessor leaves a reference to it
+            cmd.append("-fpch-preprocess")
+        cmd = ["ccache", *cmd]
+        env["CCACHE_DIR"] = str(settings.cache_root / "ccache")
+        env["CCACHE_SLOPPINESS"] = "pch_defines,time_macros,include_file_mtime"
+    return cmd + [str(source_path.resolve())], env
+
+
+def _compile_to(binary: Path, source_path: Path, flags: list[str]) -> None:
+    """Run g++ into a temporary file, then atomically move it to *binary*."""
+    tmp = binary.with_name(f".{binary.name}.{os.getpid()}.tmp")
+    cmd, env = _compiler_command(source_path, flags)
+    try:
+        result = subprocess.run(
+            [*cmd, "-o", str(tmp)],
+            capture_output=True,
+            text=True,
+            timeout=30,
+            env=env,
+        )
+        if result.returncode != 0:
+            raise CompileError(result.stderr)
+        os.replace(tmp, binary)
+    finally:
+        tmp.unlink(missing_ok=True)
 
 
 def compile_cpp(
@@ -39,55 +337,95 @@ def compile_cpp(
     Uses a content-addressed cache so unchanged sources are not recompiled.
     Raises CompileError on compilation failure.
     """
-    binary = _binary_path(source_path)
-    if binary.exists():
-        return binary
-
     flags = list(get_settings().cpp_flags)
     if extra_flags:
         flags = flags + extra_flags
 
-    result = subprocess.run(
-        ["g++", *flags, "-o", str(binary), str(source_path.resolve())],
-        capture_output=True,
-        text=True,
-        timeout=30,
-    )
-    if result.returncode != 0:
-        raise CompileError(result.stderr)
+    key = _cache_key(source_path, flags)
+    binary = _binary_path(source_path, key)
+    if _touch(binary):
+        return binary
+
+    with _inflight_guard:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        # Another thread is compiling this exact source; share its result.
+        return future.result()
+
+    try:
+        lock_name = f"{binary.name}.lock"
+        while True:
+            with _file_lock(lock_name):
+                # Another process may have finished while we waited on the lock
+                if not binary.exists():
+                    try:
+                        _compile_to(binary, source_path, flags)
+                    except BaseException:
+                        # No binary, so no index entry to remove the lock with
+                        (_cache_dir() / lock_name).unlink(missing_ok=True)
+                        raise
+            if _record_use(binary, source_path):
+                break
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    else:
+        future.set_result(binary)
+    finally:
+        with _inflight_guard:
+            del _inflight[key]
     return binary
 
 
+def compile_all(
+    sources: list[Path], *, max_workers: int | None = None
+) -> dict[Path, tuple[float, CompileError | None]]:
+    """
+    Compile several C++ sources in parallel.
+
+    Returns a mapping of source path → (elapsed seconds, CompileError or None).
+    A g++ timeout or any other failure to compile one source is reported as
+    a CompileError for that source, so it does not affect the others.
+    """
+
+    def _compile(source: Path) -> tuple[float, CompileError | None]:
+        start = time.monotonic()
+        try:
+            compile_cpp(source)
+        except CompileError as exc:
+            return time.monotonic() - start, exc
+        except subprocess.TimeoutExpired as exc:
+            error = CompileError(f"Compilation timed out after {exc.timeout}s")
+            return time.monotonic() - start, error
+        except Exception as exc:
+            logging.exception("Compiling %s failed", source)
+            error = CompileError(f"Compilation failed: {exc!r}")
+            return time.monotonic() - start, error
+        return time.monotonic() - start, None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return dict(zip(sources, pool.map(_compile, sources)))
+
+
 def run_cpp_file(
     file_path: Path,
     stdin: Path | None,
     timeout_sec: float = 1,
     *,
     extra_flags: list[str] | None = None,
+    cpu_affinity: set[int] | None = None,
 ) -> RunFileResult:
     """
     Compile (if needed) and run a C++ source file.
 
     Mirrors the signature of run_python_file: takes a source path, optional
-    stdin file, and timeout. Returns RunFileResult with exit_code/stdout/stderr.
+    stdin file, and timeout. Returns RunFileResult with exit_code/stdout/stderr
+    and resource usage. *cpu_affinity* pins the run to the given CPUs.
 
     Raises CompileError if compilation fails.
     """
     binary = compile_cpp(file_path, extra_flags=extra_flags)
-
-    kwargs = {}
-    if stdin is not None:
-        with open(stdin, "r") as f:
-            text = f.read()
-        kwargs["input"] = text
-
-    result = subprocess.run(
-        [str(binary)],
-        text=True,
-        capture_output=True,
-        timeout=timeout_sec,
-        **kwargs,
-    )
-    return RunFileResult(
-        exit_code=result.returncode, stdout=result.stdout, stderr=result.stderr
-    )
+    return run_command([str(binary)], stdin, timeout_sec, cpu_affinity=cpu_affinity)
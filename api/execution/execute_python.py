@@ -1,47 +1,349 @@
 """
 Utilities for running a python command.
+
+When enabled (Settings.python_zygote) and supported by the platform, scripts
+are forked from a warm interpreter (see python_zygote) rather than started
+from scratch, and time_ms excludes interpreter start-up.
+
+Other commands are started from a launcher: the same server without the
+preloaded imports. Peak RSS is inherited across fork and exec, so a child
+forked straight from the API process would report the API's memory as its
+own.
+
+Every run reports its wall time, CPU time (user + system), peak RSS and
+stdout size alongside the exit code and output.
 """
 
+import atexit
+import io
+import json
 import os
+import select
+import shutil
+import signal
+import socket
 import subprocess
+import tempfile
+import threading
+import time
+from functools import cache
 from pathlib import Path
 
 from pydantic import BaseModel
 
+from api.config import get_settings
+
+_ROOT_DIR = Path(__file__).parent.parent.parent.resolve()
+_ZYGOTE_SUPPORTED = all(
+    hasattr(mod, attr)
+    for mod, attr in [(os, "fork"), (os, "pidfd_open"), (socket, "send_fds")]
+)
+
 
 class RunFileResult(BaseModel):
     exit_code: int
     stdout: str
     stderr: str
+    time_ms: float | None = None
+    cpu_ms: float | None = None
+    max_rss_kb: int | None = None
+    output_bytes: int | None = None
+
+
+@cache
+def _python_env() -> dict[str, str]:
+    """The current environment with the project root appended to PYTHONPATH."""
+    python_path = os.pathsep.join([os.environ.get("PYTHONPATH", ""), str(_ROOT_DIR)])
+    # Use a copy of the current environment so you are not affecting the parent
+    return os.environ.copy() | {"PYTHONPATH": python_path}
+
+
+class _Child:
+    """A process started by a _Zygote; its exit status arrives on *conn*."""
+
+    def __init__(self, conn: socket.socket, pid: int):
+        self.conn = conn
+        self.pid = pid
+
+    def kill(self) -> None:
+        _kill_group(self.pid)  # the zygote starts each run in its own session
+
+    def wait(self, timeout_sec: float | None) -> dict | None:
+        """
+        The exit status ({"exit_code", "wall_ms", "cpu_ms", "max_rss_kb"})
+        once the process has exited, or None if it is still running after
+        *timeout_sec*.
+        """
+        self.conn.settimeout(timeout_sec)
+        try:
+            msg = self.conn.recv(4096)
+        except (socket.timeout, BlockingIOError):
+            return None
+        self.conn.close()
+        if not msg:
+            raise RuntimeError("Python zygote died while a run was in progress")
+        return json.loads(msg)
+
+
+class _Zygote:
+    """
+    Handle on a running python_zygote server process. Without *preload* it
+    only serves as a launcher for commands (see start).
+    """
+
+    def __init__(self, preload: bool = True):
+        self.dir = tempfile.mkdtemp(prefix="gm-zygote-")
+        self.socket_path = os.path.join(self.dir, "zygote.sock")
+        cmd = ["python", "-m", "api.execution.python_zygote", self.socket_path]
+        if not preload:
+            # -S: no site-packages either, to keep the launcher small
+            cmd[1:1] = ["-S"]
+            cmd.append("--no-preload")
+        self.proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=_python_env(),
+            cwd=_ROOT_DIR,
+        )
+        if self.proc.stdout.readline().strip() != b"ready":
+            self.close()
+            raise RuntimeError("Python zygote failed to start")
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def close(self) -> None:
+        if self.alive():
+            self.proc.kill()
+            self.proc.wait()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def start(self, request: dict, fds: list[int]) -> _Child:
+        """Have the zygote fork a child for *request* (see python_zygote)
+        with *fds* as its stdin, stdout and stderr."""
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            conn.connect(self.socket_path)
+            socket.send_fds(conn, [json.dumps(request).encode()], fds)
+            pid = json.loads(conn.recv(4096))["pid"]
+        except BaseException:
+            conn.close()
+            raise
+        return _Child(conn, pid)
+
+    def run(
+        self,
+        request: dict,
+        stdin: Path | None,
+        timeout_sec: float | None,
+        cmd: list[str],
+    ) -> RunFileResult:
+        """Run *request* with *stdin* as its input file and capture its
+        output; *cmd* names the run in subprocess.TimeoutExpired."""
+        stdin_file = open(stdin if stdin is not None else os.devnull, "rb")
+        with (
+            stdin_file,
+            tempfile.TemporaryFile() as out,
+            tempfile.TemporaryFile() as err,
+        ):
+            child = self.start(
+                request, [stdin_file.fileno(), out.fileno(), err.fileno()]
+            )
+            status = child.wait(timeout_sec)
+            if status is None:
+                child.kill()
+                child.wait(5)  # wait for the zygote to reap it
+                raise subprocess.TimeoutExpired(cmd, timeout_sec)
+            return _captured_result(
+                out,
+                err,
+                exit_code=status["exit_code"],
+                time_ms=status["wall_ms"],
+                cpu_ms=status["cpu_ms"],
+                max_rss_kb=status["max_rss_kb"],
+            )
+
+
+def _decode(f) -> str:
+    """Decode captured output the same way subprocess.run(text=True) does."""
+    f.seek(0)
+    wrapper = io.TextIOWrapper(f, newline=None)
+    try:
+        return wrapper.read()
+    finally:
+        wrapper.detach()  # leave *f* open for the caller
+
+
+def _captured_result(out, err, **fields) -> RunFileResult:
+    """Build a RunFileResult from stdout/stderr captured in temporary files."""
+    return RunFileResult(
+        stdout=_decode(out),
+        stderr=_decode(err),
+        output_bytes=os.fstat(out.fileno()).st_size,
+        **fields,
+    )
+
+
+def _wait_for_exit(pid: int, timeout_sec: float | None) -> bool:
+    """Wait up to *timeout_sec* for *pid* to exit without reaping it."""
+    if hasattr(os, "pidfd_open"):
+        pidfd = os.pidfd_open(pid)
+        try:
+            ready, _, _ = select.select([pidfd], [], [], timeout_sec)
+        finally:
+            os.close(pidfd)
+        return bool(ready)
+    deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+    while os.waitid(os.P_PID, pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is None:
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+def _kill_group(pid: int) -> None:
+    """SIGKILL the process group led by *pid* (a child started in its own
+    session), or just *pid* if the group is already gone."""
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def _pin_to(cpu_affinity: set[int] | None):
+    """A preexec_fn pinning the child to *cpu_affinity*, or None if unset."""
+    if not cpu_affinity:
+        return None
+    return lambda: os.sched_setaffinity(0, cpu_affinity)
+
+
+def run_command(
+    cmd: list[str],
+    stdin: Path | None,
+    timeout_sec: float | None,
+    env: dict[str, str] | None = None,
+    cpu_affinity: set[int] | None = None,
+) -> RunFileResult:
+    """
+    Run *cmd* with *stdin* as its input file and measure it.
+
+    Output is captured in temporary files rather than pipes, and the child is
+    reaped with wait4 so its CPU time and peak RSS come from rusage. Where
+    the platform allows, the child is started by the launcher (see
+    _get_launcher); otherwise it is forked from this process and its peak
+    RSS is not reported, as it would include this process's memory.
+    If *cpu_affinity* is given, the child is pinned to those CPUs.
+    The child starts its own session; on timeout its whole process group is
+    killed, so helpers it forked (e.g. generate_cases workers) go with it,
+    and subprocess.TimeoutExpired is raised.
+    """
+    launcher = _get_launcher()
+    if launcher is not None:
+        request = {"argv": cmd, "cwd": os.getcwd()}
+        if env is not None:
+            request["env"] = env
+        if cpu_affinity:
+            request["cpus"] = sorted(cpu_affinity)
+        return launcher.run(request, stdin, timeout_sec, cmd)
+
+    stdin_file = open(stdin if stdin is not None else os.devnull, "rb")
+    with stdin_file, tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            cmd,
+            stdin=stdin_file,
+            stdout=out,
+            stderr=err,
+            env=env,
+            preexec_fn=_pin_to(cpu_affinity),
+            start_new_session=True,
+        )
+        exited = _wait_for_exit(proc.pid, timeout_sec)
+        if not exited:
+            _kill_group(proc.pid)
+        _, status, usage = os.wait4(proc.pid, 0)
+        wall_ms = (time.perf_counter() - start) * 1000
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if not exited:
+            raise subprocess.TimeoutExpired(cmd, timeout_sec)
+        return _captured_result(
+            out,
+            err,
+            exit_code=proc.returncode,
+            time_ms=wall_ms,
+            cpu_ms=(usage.ru_utime + usage.ru_stime) * 1000,
+        )
+
+
+_zygote: _Zygote | None = None
+_launcher: _Zygote | None = None
+_zygote_lock = threading.Lock()
+
+
+def _running(server: _Zygote | None, preload: bool) -> _Zygote:
+    """*server* if it is still up, else a new one (call with _zygote_lock)."""
+    if server is None or not server.alive():
+        if server is not None:
+            server.close()
+        server = _Zygote(preload)
+    return server
+
+
+def _get_zygote() -> _Zygote | None:
+    """Return the shared zygote, (re)starting it if needed; None if disabled."""
+    global _zygote
+    if not (_ZYGOTE_SUPPORTED and get_settings().python_zygote):
+        return None
+    with _zygote_lock:
+        _zygote = _running(_zygote, preload=True)
+        return _zygote
+
+
+def _get_launcher() -> _Zygote | None:
+    """Return the shared launcher for commands, (re)starting it if needed;
+    None if the platform does not support it."""
+    global _launcher
+    if not _ZYGOTE_SUPPORTED:
+        return None
+    with _zygote_lock:
+        _launcher = _running(_launcher, preload=False)
+        return _launcher
+
+
+@atexit.register
+def _close_zygote() -> None:
+    for server in (_zygote, _launcher):
+        if server is not None:
+            server.close()
 
 
 def run_python_file(
     file_path: Path,
     stdin: Path | None,
     timeout_sec: float = 1,
+    cpu_affinity: set[int] | None = None,
     **env_kwargs,
 ) -> RunFileResult:
-    root_dir = Path(__file__).parent.parent.parent.resolve()
-    kwargs = {}
-    if stdin is not None:
-        with open(stdin, "r") as f:
-            text = f.read()
-        kwargs["input"] = text
-
-    # Append to the current PYTHONPATH if it exists
-    python_path = os.pathsep.join([os.environ.get("PYTHONPATH", ""), str(root_dir)])
-    # Use a copy of the current environment so you are not affecting the parent
-    curr_env = os.environ.copy()
-    modified_env = curr_env | {"PYTHONPATH": python_path} | env_kwargs
+    """
+    Run a Python script with *stdin* as its input file. Keyword arguments
+    other than *cpu_affinity* (CPUs to pin the run to) are added to its
+    environment.
+    """
+    zygote = _get_zygote()
+    if zygote is not None:
+        request = {"path": str(file_path.resolve()), "env": env_kwargs}
+        if cpu_affinity:
+            request["cpus"] = sorted(cpu_affinity)
+        return zygote.run(request, stdin, timeout_sec, ["python", str(file_path)])
 
-    result = subprocess.run(
+    return run_command(
         ["python", str(file_path.resolve())],
-        text=True,
-        capture_output=True,
-        timeout=timeout_sec,
-        env=modified_env,
-        **kwargs,
-    )
-    return RunFileResult(
-        exit_code=result.returncode, stdout=result.stdout, stderr=result.stderr
+        stdin,
+        timeout_sec,
+        env=_python_env() | env_kwargs,
+        cpu_affinity=cpu_affinity,
     )
@@ -0,0 +1,324 @@
+"""
+Judge host: a worker process that runs interactive judges out of the API
+process, so a judge stuck in a loop can be killed instead of leaking a thread.
+
+The host is started by run_interactive and talks to it over a SOCK_SEQPACKET
+socket passed as its only argument. Each request is one JSON packet carrying
+the judge path, the test input path and the limits, together with the
+solution's stdin/stdout/stderr pipe ends. The host plays one session and
+replies with one JSON packet: the judge's result plus interaction stats, or
+{"error": traceback} if the judge itself raised.
+
+Judge modules are cached in the host, keyed on their path and content hash,
+so top-level judge setup runs once per host rather than once per test case.
+Their read_line / write_line / make_result are replaced with trampolines that
+dispatch to the current session.
+
+Solution I/O is non-blocking and multiplexed with a selector, so the
+solution's stderr is drained continuously and a chatty solution cannot
+deadlock on a full pipe.
+
+If the request names a transcript_path, every line exchanged is also recorded
+in a ring buffer holding the last transcript_max_lines lines, which is written
+out as gzip-compressed JSON lines when the session ends: a header
+{"total_lines": int, "dropped": int}, then one {"sender": "judge" |
+"solution", "t_ms": float, "line": str} per line, oldest first.
+
+This module only depends on the standard library so the host stays light.
+"""
+
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+import resource
+import selectors
+import signal
+import socket
+import sys
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from types import ModuleType
+
+_READ_SIZE = 1 << 16
+_STDERR_TAIL = 1 << 16  # bytes of solution stderr kept for reporting
+_MAX_MESSAGE = 1 << 16
+_TRANSCRIPT_LINE_MAX = 1 << 12  # characters of each line kept in a transcript
+
+# resolved judge path → (content digest, loaded module)
+_judge_cache: dict[Path, tuple[str, ModuleType]] = {}
+# The _SolutionIO that judge I/O is currently routed to
+_current_io: "_SolutionIO | None" = None
+
+
+class _ResultSignal(BaseException):
+    """Raised by make_result to short-circuit grade() and capture the result."""
+
+    def __init__(self, verdict: str, points: float, comment: str):
+        self.result = {"verdict": verdict, "points": points, "comment": comment}
+
+
+class _WallTimeout(BaseException):
+    """Raised from solution I/O once the wall-clock deadline has passed."""
+
+
+class _SolutionIO:
+    """Line-based, non-blocking I/O with a solution process."""
+
+    def __init__(
+        self,
+        stdin,
+        stdout,
+        stderr,
+        pid: int,
+        deadline: float,
+        transcript: deque | None = None,
+    ):
+        self.stdin = stdin
+        self.pid = pid
+        self.deadline = deadline
+        self.start = time.monotonic()
+        self.transcript = transcript  # (sender, t_ms, line); None when not recording
+        self.stdout = bytearray()
+        self.stderr = bytearray()
+        self.stdout_eof = False
+        self.output_bytes = 0
+        self.pending = bytearray()  # written by the judge, not yet sent
+        self.exchanges = 0
+        self.replies = 0  # reads that answered a judge write
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+        self._last_write: float | None = None
+        self.lines = 0  # lines recorded, including those dropped from the transcript
+
+        self.sel = selectors.DefaultSelector()
+        for pipe in (stdin, stdout, stderr):
+            os.set_blocking(pipe.fileno(), False)
+        self.sel.register(stdout, selectors.EVENT_READ, "stdout")
+        self.sel.register(stderr, selectors.EVENT_READ, "stderr")
+
+    def _pump(self, done) -> None:
+        """Move data between the pipes until done() holds or the deadline passes."""
+        while not done():
+            timeout = self.deadline - time.monotonic()
+            if timeout <= 0:
+                raise _WallTimeout()
+            for key, _ in self.sel.select(timeout):
+                fd = key.fileobj.fileno()
+                if key.data == "stdin":
+                    try:
+                        written = os.write(fd, self.pending)
+                    except BrokenPipeError:
+                        self.sel.unregister(key.fileobj)
+                        raise EOFError("Solution closed stdin")
+                    del self.pending[:written]
+                    if not self.pending:
+                        self.sel.unregister(key.fileobj)
+                    continue
+                data = os.read(fd, _READ_SIZE)
+                if not data:
+                    self.sel.unregister(key.fileobj)
+                    if key.data == "stdout":
+                        self.stdout_eof = True
+                elif key.data == "stdout":
+                    self.stdout += data
+                    self.output_bytes += len(data)
+                else:
+                    self.stderr += data
+                    del self.stderr[:-_STDERR_TAIL]
+
+    def read_line(self) -> str:
+        self._pump(lambda: b"\n" in self.stdout or self.stdout_eof)
+        end = self.stdout.find(b"\n")
+        if end < 0:
+            if not self.stdout:
+                raise EOFError("Solution closed stdout")
+            end = len(self.stdout)
+        line = bytes(self.stdout[:end]).decode(errors="replace")
+        del self.stdout[: end + 1]
+
+        now = time.monotonic()
+        self.exchanges += 1
+        if self._last_write is not None:
+            latency_ms = (now - self._last_write) * 1000
+            self.replies += 1
+            self.total_latency_ms += latency_ms
+            self.max_latency_ms = max(self.max_latency_ms, latency_ms)
+            self._last_write = None
+        if self.transcript is not None:
+            self._record("solution", now, line)
+        return line
+
+    def write_line(self, s: str) -> None:
+        line = str(s)
+        if not self.pending:
+            self.sel.register(self.stdin, selectors.EVENT_WRITE, "stdin")
+        self.pending += (line + "\n").encode()
+        self._pump(lambda: not self.pending)
+        self._last_write = time.monotonic()
+        if self.transcript is not None:
+            self._record("judge", self._last_write, line)
+
+    def _record(self, sender: str, now: float, line: str) -> None:
+        self.lines += 1
+        self.transcript.append(
+            (sender, (now - self.start) * 1000, line[:_TRANSCRIPT_LINE_MAX])
+        )
+
+    def finish(self) -> None:
+        """Close the solution's stdin and drain its output until it exits.
+
+        The solution is killed if it outlives the deadline.
+        """
+        if self.pending:
+            self.sel.unregister(self.stdin)
+            self.pending.clear()
+        try:
+            self.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._pump(lambda: not self.sel.get_map())
+        except (_WallTimeout, EOFError):
+            try:
+                os.kill(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        for key in list(self.sel.get_map().values()):
+            key.fileobj.close()
+        self.sel.close()
+
+
+def _session_read_line() -> str:
+    return _current_io.read_line()
+
+
+def _session_write_line(s: str) -> None:
+    _current_io.write_line(s)
+
+
+def _session_make_result(code: str, pts: float, comment: str = ""):
+    raise _ResultSignal(code, pts, comment)
+
+
+def _load_judge(judge_path: Path) -> ModuleType:
+    """Return the judge module, re-executing it only if its content changed."""
+    key = judge_path.resolve()
+    digest = hashlib.sha256(key.read_bytes()).hexdigest()
+    cached = _judge_cache.get(key)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+
+    # exec_module runs the module body which re-defines the stubs, so we
+    # patch after.
+    spec = importlib.util.spec_from_file_location("_judge", key)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    mod.read_line = _session_read_line
+    mod.write_line = _session_write_line
+    mod.make_result = _session_make_result
+    _judge_cache[key] = (digest, mod)
+    return mod
+
+
+def _write_transcript(path: Path, sol_io: _SolutionIO) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with gzip.open(tmp, "wt", compresslevel=1) as f:
+        header = {
+            "total_lines": sol_io.lines,
+            "dropped": sol_io.lines - len(sol_io.transcript),
+        }
+        f.write(json.dumps(header) + "\n")
+        for sender, t_ms, line in sol_io.transcript:
+            f.write(json.dumps({"sender": sender, "t_ms": round(t_ms, 3), "line": line}))
+            f.write("\n")
+    os.replace(tmp, path)
+
+
+def _play(request: dict, fds: list[int]) -> dict:
+    """Run one judge session against the solution connected to *fds*."""
+    global _current_io
+
+    # Give this session its own CPU budget on top of what the host has used
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = usage.ru_utime + usage.ru_stime
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(used + request["wall_timeout_sec"]) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+    transcript_path = request.get("transcript_path")
+    transcript = (
+        deque(maxlen=request["transcript_max_lines"]) if transcript_path else None
+    )
+
+    start = time.monotonic()
+    stdin = os.fdopen(fds[0], "wb", buffering=0)
+    stdout = os.fdopen(fds[1], "rb", buffering=0)
+    stderr = os.fdopen(fds[2], "rb", buffering=0)
+    sol_io = _SolutionIO(
+        stdin,
+        stdout,
+        stderr,
+        pid=request["pid"],
+        deadline=start + request["wall_timeout_sec"],
+        transcript=transcript,
+    )
+
+    input_path = Path(request["input_path"])
+    input_data = input_path.read_text() if input_path.exists() else ""
+    points = request["points"]
+
+    _current_io = sol_io
+    try:
+        mod = _load_judge(Path(request["judge_path"]))
+        mod.grade(input_data, points)
+        # If grade() returns without calling make_result, treat as WA
+        result = {
+            "verdict": "WA",
+            "points": 0,
+            "comment": "Judge returned without calling make_result",
+        }
+    except _ResultSignal as sig:
+        result = sig.result
+    except _WallTimeout:
+        result = {"verdict": "TLE", "points": 0, "comment": "Wall time limit exceeded"}
+    except EOFError as e:
+        result = {"verdict": "WA", "points": 0, "comment": f"{e} unexpectedly"}
+    finally:
+        _current_io = None
+        sol_io.finish()
+        if transcript is not None:
+            _write_transcript(Path(transcript_path), sol_io)
+
+    result["wall_ms"] = (time.monotonic() - start) * 1000
+    result["exchanges"] = sol_io.exchanges
+    result["output_bytes"] = sol_io.output_bytes
+    result["mean_latency_ms"] = (
+        sol_io.total_latency_ms / sol_io.replies if sol_io.replies else 0
+    )
+    result["max_latency_ms"] = sol_io.max_latency_ms
+    return result
+
+
+def serve(fd: int) -> None:
+    conn = socket.socket(fileno=fd)
+    while True:
+        msg, fds, _, _ = socket.recv_fds(conn, _MAX_MESSAGE, 3)
+        if not msg:
+            # The API process closed its end
+            return
+        try:
+            reply = _play(json.loads(msg), fds)
+        except Exception:
+            reply = {"error": traceback.format_exc()}
+        conn.send(json.dumps(reply).encode())
+
+
+if __name__ == "__main__":
+    serve(int(sys.argv[1]))
@@ -0,0 +1,230 @@
+"""
+Per-test resource profiles of solution runs.
+
+run_solutions_job records one row per (solution, test case) it runs: the
+verdict, time, CPU time, peak RSS and output size. The rows of a job are
+stored column by column under {cache_root}/profiles/{job_id}.zip, one packed
+``array`` per column plus a JSON header holding the solution, test case and
+verdict names that the index columns refer to.
+
+build_profile_report summarises a stored profile into per-set timing
+percentiles, the slowest cases and each AC solution's margin against the
+time limit.
+"""
+
+import json
+import math
+import sys
+import zipfile
+from array import array
+from pathlib import Path
+
+from api.models.problem import (
+    ProfileReport,
+    SafetyMargin,
+    SetProfile,
+    SlowCase,
+    TimingPercentiles,
+    Verdict,
+)
+
+# column name → array typecode; missing floats are NaN, missing ints -1
+_COLUMNS = {
+    "solution": "H",  # index into ResourceProfile.solutions
+    "case": "I",  # index into ResourceProfile.cases
+    "verdict": "B",  # index into ResourceProfile.verdicts
+    "time_ms": "d",
+    "cpu_ms": "d",
+    "max_rss_kb": "q",
+    "output_bytes": "q",
+}
+_HEADER_NAME = "header.json"
+
+
+def _or_missing(value, typecode: str):
+    if value is not None:
+        return value
+    return math.nan if typecode == "d" else -1
+
+
+def _is_missing(value) -> bool:
+    return value == -1 or (isinstance(value, float) and math.isnan(value))
+
+
+class ResourceProfile:
+    """Columnar table of per-test resource usage for one job."""
+
+    def __init__(self):
+        self.solutions: list[str] = []
+        self.cases: list[tuple[str, str]] = []  # (test set, test case)
+        self.verdicts: list[str] = []
+        self.columns = {name: array(code) for name, code in _COLUMNS.items()}
+        self._lookup: dict[str, dict] = {"solution": {}, "case": {}, "verdict": {}}
+
+    def __len__(self) -> int:
+        return len(self.columns["solution"])
+
+    def _index(self, column: str, table: list, value) -> int:
+        lookup = self._lookup[column]
+        if value not in lookup:
+            lookup[value] = len(table)
+            table.append(value)
+        return lookup[value]
+
+    def add(self, solution_path: str, verdict: Verdict) -> None:
+        cols = self.columns
+        cols["solution"].append(self._index("solution", self.solutions, solution_path))
+        cols["case"].append(
+            self._index("case", self.cases, (verdict.test_set, verdict.test_case))
+        )
+        cols["verdict"].append(self._index("verdict", self.verdicts, verdict.verdict))
+        for name in ("time_ms", "cpu_ms", "max_rss_kb", "output_bytes"):
+            cols[name].append(_or_missing(getattr(verdict, name), _COLUMNS[name]))
+
+    def rows(self):
+        """Yield each row as a dict, with names resolved and missing values as None."""
+        cols = self.columns
+        for i in range(len(self)):
+            test_set, test_case = self.cases[cols["case"][i]]
+            row = {
+                "solution_path": self.solutions[cols["solution"][i]],
+                "test_set": test_set,
+                "test_case": test_case,
+                "verdict": self.verdicts[cols["verdict"][i]],
+            }
+            for name in ("time_ms", "cpu_ms", "max_rss_kb", "output_bytes"):
+                value = cols[name][i]
+                row[name] = None if _is_missing(value) else value
+            yield row
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        header = {
+            "byteorder": sys.byteorder,
+            "solutions": self.solutions,
+            "cases": self.cases,
+            "verdicts": self.verdicts,
+            "columns": _COLUMNS,
+        }
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as zf:
+            zf.writestr(_HEADER_NAME, json.dumps(header))
+            for name, values in self.columns.items():
+                zf.writestr(name, values.tobytes())
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> "ResourceProfile":
+        profile = cls()
+        with zipfile.ZipFile(path) as zf:
+            header = json.loads(zf.read(_HEADER_NAME))
+            profile.solutions = header["solutions"]
+            profile.cases = [tuple(case) for case in header["cases"]]
+            profile.verdicts = header["verdicts"]
+            for name, code in header["columns"].items():
+                values = array(code)
+                values.frombytes(zf.read(name))
+                if header["byteorder"] != sys.byteorder:
+                    values.byteswap()
+                profile.columns[name] = values
+        return profile
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Linearly interpolated percentile of an already sorted list."""
+    pos = (len(ordered) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _percentiles(values: list[float]) -> TimingPercentiles | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return TimingPercentiles(
+        p50=_percentile(ordered, 50),
+        p90=_percentile(ordered, 90),
+        p99=_percentile(ordered, 99),
+        max=ordered[-1],
+    )
+
+
+def build_profile_report(
+    profile: ResourceProfile,
+    job_id: str,
+    time_limit_sec: float,
+    ac_solutions: set[str],
+    slowest: int = 10,
+) -> ProfileReport:
+    """
+    Summarise *profile*: timing percentiles per (solution, test set), the
+    *slowest* cases overall, and for each solution in *ac_solutions* the
+    ratio of the time limit to its slowest accepted case.
+    """
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for row in profile.rows():
+        groups.setdefault((row["solution_path"], row["test_set"]), []).append(row)
+
+    sets = []
+    for (solution_path, test_set), rows in groups.items():
+        rss = [r["max_rss_kb"] for r in rows if r["max_rss_kb"] is not None]
+        out = [r["output_bytes"] for r in rows if r["output_bytes"] is not None]
+        sets.append(
+            SetProfile(
+                solution_path=solution_path,
+                test_set=test_set,
+                cases=len(rows),
+                time_ms=_percentiles(
+                    [r["time_ms"] for r in rows if r["time_ms"] is not None]
+                ),
+                cpu_ms=_percentiles(
+                    [r["cpu_ms"] for r in rows if r["cpu_ms"] is not None]
+                ),
+                max_rss_kb=max(rss, default=None),
+                max_output_bytes=max(out, default=None),
+            )
+        )
+
+    timed = [row for row in profile.rows() if row["time_ms"] is not None]
+    timed.sort(key=lambda row: row["time_ms"], reverse=True)
+    slow_cases = [
+        SlowCase(
+            solution_path=row["solution_path"],
+            test_set=row["test_set"],
+            test_case=row["test_case"],
+            verdict=row["verdict"],
+            time_ms=row["time_ms"],
+            cpu_ms=row["cpu_ms"],
+        )
+        for row in timed[:slowest]
+    ]
+
+    limit_ms = time_limit_sec * 1000
+    margins = []
+    for solution_path in profile.solutions:
+        if solution_path not in ac_solutions:
+            continue
+        times = [
+            row["time_ms"]
+            for row in timed
+            if row["solution_path"] == solution_path and row["verdict"] == "AC"
+        ]
+        if not times:
+            continue
+        worst = max(times)
+        margins.append(
+            SafetyMargin(
+                solution_path=solution_path,
+                max_time_ms=worst,
+                margin=limit_ms / worst if worst > 0 else None,
+            )
+        )
+
+    return ProfileReport(
+        job_id=job_id,
+        time_limit_ms=limit_ms,
+        sets=sets,
+        slowest=slow_cases,
+        safety_margins=margins,
+    )
@@ -0,0 +1,193 @@
+"""
+Warm Python interpreter ("zygote") for running solutions, validators and
+generators without paying interpreter start-up on every run.
+
+The zygote is started once per API process (see execute_python). It imports
+testlibpy up front, then listens on a Unix socket. For every request it forks;
+the child starts a new session, swaps in the requested stdin/stdout/stderr,
+runs the script with runpy as ``__main__`` and exits, so each run still gets
+its own process image, and a timeout can kill its whole process group.
+Timing is measured from the fork, so interpreter boot is excluded.
+
+Started with --no-preload, the same server is the launcher for other commands
+(C++ binaries, interactive solutions): a request with "argv" instead of
+"path" execs it in the forked child. Peak RSS is inherited across fork and
+exec, so a command started by the API process would report the API's memory
+as its own; from this small process it reports its own peak, or the
+launcher's few MB if that is more.
+
+Protocol (one JSON message per SOCK_SEQPACKET packet):
+
+    client → zygote: {"path": str, "env": {str: str}, "cpus": [int] (optional)}
+                  or {"argv": [str], "env": {str: str} (optional, the whole
+                      environment), "cwd": str (optional), "cpus": [int]
+                      (optional), "cpu_limit_sec": int (optional)}
+                     + stdin/stdout/stderr fds
+    zygote → client: {"pid": int}
+    zygote → client: {"exit_code": int, "wall_ms": float,
+                      "cpu_ms": float, "max_rss_kb": int}
+
+This module only depends on the standard library so the zygote stays light.
+"""
+
+import json
+import os
+import random
+import resource
+import runpy
+import selectors
+import socket
+import sys
+import time
+import traceback
+
+_PRELOAD = ["testlibpy"]
+_MAX_MESSAGE = 1 << 16
+
+
+def _close_inherited_fds() -> None:
+    """Close everything but stdin/stdout/stderr in a freshly forked child."""
+    for name in os.listdir("/proc/self/fd"):
+        fd = int(name)
+        if fd > 2:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def _run_child(request: dict, fds: list[int]) -> None:
+    """Body of a forked child: run the script and exit with its status."""
+    # A session of its own, so a timeout kills the run and anything it forked
+    os.setsid()
+    for target, fd in enumerate(fds):
+        os.dup2(fd, target)
+    _close_inherited_fds()
+
+    if request.get("cpus"):
+        os.sched_setaffinity(0, request["cpus"])
+    if "argv" in request:
+        _exec(request)
+    os.environ.update(request["env"])
+    script = request["path"]
+    sys.argv = [script]
+    sys.path[0] = os.path.dirname(script)
+    # Children would otherwise all continue the zygote's random stream
+    random.seed()
+
+    code = 0
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SystemExit as exc:
+        if exc.code is None:
+            code = 0
+        elif isinstance(exc.code, int):
+            code = exc.code
+        else:
+            print(exc.code, file=sys.stderr)
+            code = 1
+    except BaseException as exc:
+        # Drop the runpy frames so the traceback matches `python script.py`
+        tb = exc.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script:
+            tb = tb.tb_next
+        traceback.print_exception(type(exc), exc, tb or exc.__traceback__)
+        code = 1
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except Exception:
+        pass
+    os._exit(code)
+
+
+def _exec(request: dict) -> None:
+    """Replace a forked child with the requested command."""
+    if request.get("cpu_limit_sec"):
+        limit = request["cpu_limit_sec"]
+        resource.setrlimit(resource.RLIMIT_CPU, (limit, limit))
+    argv = request["argv"]
+    try:
+        if request.get("cwd"):
+            os.chdir(request["cwd"])
+        os.execvpe(argv[0], argv, request.get("env", os.environ))
+    except OSError as exc:
+        print(f"Could not run {argv[0]}: {exc}", file=sys.stderr, flush=True)
+    os._exit(127)
+
+
+def _send(conn: socket.socket, message: dict) -> None:
+    try:
+        conn.send(json.dumps(message).encode())
+    except OSError:
+        # Client went away (e.g. it gave up on a timeout); nothing to report to
+        pass
+
+
+def serve(socket_path: str, preload: bool = True) -> None:
+    for module in _PRELOAD if preload else []:
+        try:
+            __import__(module)
+        except ImportError:
+            pass
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    server.bind(socket_path)
+    server.listen()
+
+    sel = selectors.DefaultSelector()
+    sel.register(server, selectors.EVENT_READ, ("accept",))
+    # stdin is a pipe from the API process; EOF means the parent has gone
+    sel.register(sys.stdin.fileno(), selectors.EVENT_READ, ("parent",))
+
+    print("ready", flush=True)
+
+    while True:
+        for key, _ in sel.select():
+            kind = key.data[0]
+            if kind == "accept":
+                conn, _ = server.accept()
+                sel.register(conn, selectors.EVENT_READ, ("request",))
+            elif kind == "parent":
+                if not os.read(sys.stdin.fileno(), 4096):
+                    server.close()
+                    return
+            elif kind == "request":
+                conn = key.fileobj
+                sel.unregister(conn)
+                msg, fds, _, _ = socket.recv_fds(conn, _MAX_MESSAGE, 3)
+                if not msg or len(fds) != 3:
+                    for fd in fds:
+                        os.close(fd)
+                    conn.close()
+                    continue
+                request = json.loads(msg)
+                start = time.perf_counter()
+                pid = os.fork()
+                if pid == 0:
+                    _run_child(request, fds)
+                for fd in fds:
+                    os.close(fd)
+                pidfd = os.pidfd_open(pid)
+                sel.register(pidfd, selectors.EVENT_READ, ("child", pid, conn, start))
+                _send(conn, {"pid": pid})
+            elif kind == "child":
+                _, pid, conn, start = key.data
+                sel.unregister(key.fd)
+                os.close(key.fd)
+                _, status, usage = os.wait4(pid, 0)
+                wall_ms = (time.perf_counter() - start) * 1000
+                _send(
+                    conn,
+                    {
+                        "exit_code": os.waitstatus_to_exitcode(status),
+                        "wall_ms": wall_ms,
+                        "cpu_ms": (usage.ru_utime + usage.ru_stime) * 1000,
+                        "max_rss_kb": usage.ru_maxrss,
+                    },
+                )
+                conn.close()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], preload="--no-preload" not in sys.argv[2:])
@@ -2,131 +2,281 @@
 Run an interactive problem: spawn the solution as a subprocess and drive it
 with a judge.py that defines read_line, write_line, make_result, and grade.
 
-The judge module is loaded dynamically; we replace its read_line / write_line /
-make_result with implementations wired to the solution subprocess, then call
-grade(input_data, points).
+The judge does not run in the API process. Each session is handed to a judge
+host (see judge_host): a worker process that receives the solution's pipe
+ends, plays the judge against it and reports the result. Hosts run under a
+memory limit (Settings.judge_memory_bytes) and a per-session CPU limit, and a
+host that overruns the wall-clock limit is killed rather than left running.
+Idle hosts are pooled and reused so judge modules stay loaded between test
+cases, and several interactive tests can run at once.
+
+The solution is started by the launcher (see execute_python), so its peak RSS
+is its own rather than the API process's. Its own CPU time is taken from
+rusage and checked against the time limit; wall time is enforced separately with a looser limit, since it also
+includes the judge's work.
+
+Sessions can optionally record a transcript of the exchange, written by the
+host to a gzip-compressed JSON lines file (see judge_host for the format) and
+read back with load_transcript.
 """
 
-import importlib.util
+import atexit
+import gzip
+import json
+import math
 import os
+import resource
+import socket
 import subprocess
 import threading
 from dataclasses import dataclass
 from pathlib import Path
 
+from api.config import get_settings
+from api.execution.execute_python import _Child, _get_launcher, _python_env
+from api.models.problem import TranscriptEntry, TranscriptResponse
+
+_ROOT_DIR = Path(__file__).parent.parent.parent.resolve()
+_HOST_GRACE_SEC = 2  # extra time a host gets to report after the wall limit
+_MAX_MESSAGE = 1 << 16
+
 
 @dataclass
 class InteractiveResult:
     verdict: str  # "AC" | "WA" etc.
     points: float
     comment: str
+    cpu_ms: float = 0  # solution CPU time (user + system)
+    max_rss_kb: int = 0
+    output_bytes: int = 0  # bytes the solution wrote to stdout
+    wall_ms: float = 0
+    exchanges: int = 0  # lines read from the solution
+    mean_latency_ms: float = 0  # judge write → solution reply
+    max_latency_ms: float = 0
+
+
+class _JudgeHost:
+    """Handle on a running judge_host worker process."""
+
+    def __init__(self):
+        self.conn, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        memory = get_settings().judge_memory_bytes
+
+        def _limit_memory():
+            resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+
+        with child:
+            self.proc = subprocess.Popen(
+                ["python", "-m", "api.execution.judge_host", str(child.fileno())],
+                stdin=subprocess.DEVNULL,
+                pass_fds=(child.fileno(),),
+                env=_python_env(),
+                cwd=_ROOT_DIR,
+                preexec_fn=_limit_memory,
+            )
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def close(self) -> None:
+        self.conn.close()
+        if self.alive():
+            self.proc.kill()
+        self.proc.wait()
+
+    def play(self, request: dict, pipes: list, timeout_sec: float) -> dict:
+        """
+        Hand *pipes* (the solution's stdin, stdout and stderr) to the host,
+        run one session and return the host's reply.
+
+        Raises RuntimeError if the host dies mid-session or does not answer
+        within *timeout_sec* (it is killed in that case).
+        """
+        try:
+            socket.send_fds(
+                self.conn,
+                [json.dumps(request).encode()],
+                [pipe.fileno() for pipe in pipes],
+            )
+        finally:
+            # The host holds its own copies now; ours would keep the pipes
+            # open and hide EOF from both sides.
+            for pipe in pipes:
+                pipe.close()
+        self.conn.settimeout(timeout_sec)
+        try:
+            msg = self.conn.recv(_MAX_MESSAGE)
+        except socket.timeout:
+            self.close()
+            raise RuntimeError(f"Judge did not finish within {timeout_sec:g}s")
+        except ConnectionError:
+            msg = b""
+        if not msg:
+            self.close()
+            raise RuntimeError(
+                f"Judge process died (exit code {self.proc.returncode}); "
+                "it may have exceeded its memory or CPU limit"
+            )
+        return json.loads(msg)
+
+
+_idle_hosts: list[_JudgeHost] = []
+_hosts_lock = threading.Lock()
 
 
-class _ResultSignal(BaseException):
-    """Raised by make_result to short-circuit grade() and capture the result."""
+def _acquire_host() -> _JudgeHost:
+    with _hosts_lock:
+        while _idle_hosts:
+            host = _idle_hosts.pop()
+            if host.alive():
+                return host
+            host.close()
+    return _JudgeHost()
 
-    def __init__(self, result: InteractiveResult):
-        self.result = result
+
+def _release_host(host: _JudgeHost) -> None:
+    with _hosts_lock:
+        _idle_hosts.append(host)
+
+
+@atexit.register
+def _close_hosts() -> None:
+    with _hosts_lock:
+        for host in _idle_hosts:
+            host.close()
+        _idle_hosts.clear()
+
+
+def _reap(child: _Child, timeout_sec: float) -> dict:
+    """Wait up to *timeout_sec* for *child* (killing it after), return its
+    exit status."""
+    status = child.wait(max(timeout_sec, 0))
+    if status is None:
+        child.kill()
+        status = child.wait(None)
+    return status
+
+
+def _start_solution(
+    solution_cmd: list[str], cpu_limit: int, cpu_affinity: set[int] | None
+) -> tuple[_Child, list]:
+    """Start *solution_cmd* from the launcher with pipes for its stdin,
+    stdout and stderr; return it and our ends of the pipes."""
+    launcher = _get_launcher()
+    if launcher is None:
+        raise RuntimeError("Interactive problems need Linux (pidfd_open, send_fds)")
+    stdin_r, stdin_w = os.pipe()
+    stdout_r, stdout_w = os.pipe()
+    stderr_r, stderr_w = os.pipe()
+    request = {
+        "argv": solution_cmd,
+        "env": _python_env(),
+        "cwd": os.getcwd(),
+        "cpu_limit_sec": cpu_limit,
+    }
+    if cpu_affinity:
+        request["cpus"] = sorted(cpu_affinity)
+    pipes = [
+        open(stdin_w, "wb", buffering=0),
+        open(stdout_r, "rb", buffering=0),
+        open(stderr_r, "rb", buffering=0),
+    ]
+    try:
+        child = launcher.start(request, [stdin_r, stdout_w, stderr_w])
+    except BaseException:
+        for pipe in pipes:
+            pipe.close()
+        raise
+    finally:
+        for fd in (stdin_r, stdout_w, stderr_w):
+            os.close(fd)
+    return child, pipes
 
 
 def run_interactive_testcase(
     problem_path: Path,
     judge_path: Path,
     solution_cmd: list[str],
-    input_data: str,
+    input_path: Path,
     points: float,
     timeout_sec: float,
+    wall_timeout_sec: float | None = None,
+    transcript_path: Path | None = None,
+    cpu_affinity: set[int] | None = None,
 ) -> InteractiveResult:
     """
-    Spawn *solution_cmd* as a subprocess, load the judge from *judge_path*,
-    wire up read_line/write_line/make_result, and call grade(input_data, points).
-    """
-    root_dir = Path(__file__).parent.parent.parent.resolve()
-    python_path = os.pathsep.join(
-        [os.environ.get("PYTHONPATH", ""), str(root_dir)]
-    )
-    env = os.environ.copy()
-    env["PYTHONPATH"] = python_path
-
-    proc = subprocess.Popen(
-        solution_cmd,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        env=env,
-    )
+    Spawn *solution_cmd* as a subprocess and have a judge host run
+    grade(input_data, points) from *judge_path* against it, where input_data
+    is the content of *input_path*.
 
-    # -- Patch functions onto the judge module --
+    *timeout_sec* limits the solution's CPU time. *wall_timeout_sec* limits
+    the whole interaction and defaults to max(2 * timeout_sec, timeout_sec + 1).
 
-    def read_line() -> str:
-        line = proc.stdout.readline()
-        if not line:
-            raise EOFError("Solution closed stdout")
-        return line.rstrip("\n")
+    If *transcript_path* is given, the exchange is recorded there (keeping
+    the last Settings.transcript_max_lines lines). *cpu_affinity* pins the
+    solution to the given CPUs.
 
-    def write_line(s: str) -> None:
-        proc.stdin.write(str(s) + "\n")
-        proc.stdin.flush()
+    Raises RuntimeError if the judge fails (raises, or its host dies).
+    """
+    if wall_timeout_sec is None:
+        wall_timeout_sec = max(2 * timeout_sec, timeout_sec + 1)
 
-    def make_result(code: str, pts: float, comment: str = ""):
-        raise _ResultSignal(InteractiveResult(verdict=code, points=pts, comment=comment))
+    cpu_limit = math.ceil(timeout_sec) + 1
 
-    # Load the judge module, then patch the stub functions with our wired versions.
-    # (exec_module runs the module body which re-defines the stubs, so we patch after.)
-    spec = importlib.util.spec_from_file_location("_judge", judge_path)
-    mod = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(mod)
-    mod.read_line = read_line
-    mod.write_line = write_line
-    mod.make_result = make_result
+    host = _acquire_host()
+    child, pipes = _start_solution(solution_cmd, cpu_limit, cpu_affinity)
+    request = {
+        "judge_path": str(judge_path.resolve()),
+        "input_path": str(input_path.resolve()),
+        "points": points,
+        "wall_timeout_sec": wall_timeout_sec,
+        "pid": child.pid,
+    }
+    if transcript_path is not None:
+        request["transcript_path"] = str(transcript_path.resolve())
+        request["transcript_max_lines"] = get_settings().transcript_max_lines
+    try:
+        reply = host.play(request, pipes, wall_timeout_sec + _HOST_GRACE_SEC)
+    except BaseException:
+        child.kill()
+        _reap(child, 0)
+        raise
 
-    # Run grade() in a thread so we can enforce the timeout
-    result_holder: list[InteractiveResult] = []
-    exc_holder: list[Exception] = []
+    _release_host(host)
+    # The host has already waited out the wall limit on the solution's
+    # output, so this only covers a solution that closed its pipes early.
+    status = _reap(child, _HOST_GRACE_SEC)
+    cpu_ms = status["cpu_ms"]
 
-    def _run():
-        try:
-            mod.grade(input_data, points)
-            # If grade() returns without calling make_result, treat as WA
-            result_holder.append(
-                InteractiveResult(verdict="WA", points=0, comment="Judge returned without calling make_result")
-            )
-        except _ResultSignal as sig:
-            result_holder.append(sig.result)
-        except EOFError:
-            result_holder.append(
-                InteractiveResult(verdict="WA", points=0, comment="Solution closed stdout unexpectedly")
-            )
-        except Exception as e:
-            exc_holder.append(e)
+    if "error" in reply:
+        raise RuntimeError(f"Judge raised an exception:\n{reply['error']}")
 
-    thread = threading.Thread(target=_run)
-    thread.start()
-    thread.join(timeout=timeout_sec)
+    result = InteractiveResult(
+        verdict=reply["verdict"],
+        points=reply["points"],
+        comment=reply["comment"],
+    )
+    if cpu_ms > timeout_sec * 1000:
+        result = InteractiveResult(
+            verdict="TLE", points=0, comment="Time Limit Exceeded"
+        )
+    result.cpu_ms = cpu_ms
+    result.max_rss_kb = status["max_rss_kb"]
+    result.output_bytes = reply["output_bytes"]
+    result.wall_ms = reply["wall_ms"]
+    result.exchanges = reply["exchanges"]
+    result.mean_latency_ms = reply["mean_latency_ms"]
+    result.max_latency_ms = reply["max_latency_ms"]
+    return result
 
-    if thread.is_alive():
-        proc.kill()
-        proc.wait()
-        thread.join(timeout=2)
-        return InteractiveResult(verdict="TLE", points=0, comment="Time Limit Exceeded")
 
-    # Clean up
-    try:
-        proc.stdin.close()
-    except Exception:
-        pass
-    try:
-        proc.stdout.close()
-    except Exception:
-        pass
-    if proc.poll() is None:
-        proc.kill()
-    proc.wait()
-
-    if exc_holder:
-        raise exc_holder[0]
-
-    return result_holder[0] if result_holder else InteractiveResult(
-        verdict="IE", points=0, comment="No result from judge"
+def load_transcript(path: Path) -> TranscriptResponse:
+    """Read a transcript recorded by run_interactive_testcase."""
+    with gzip.open(path, "rt") as f:
+        header = json.loads(f.readline())
+        entries = [TranscriptEntry(**json.loads(line)) for line in f]
+    return TranscriptResponse(
+        total_lines=header["total_lines"],
+        dropped=header["dropped"],
+        entries=entries,
     )
@@ -2,7 +2,9 @@
 Run your program against a single test case
 """
 
+import io
 import logging
+import os
 from subprocess import TimeoutExpired
 import time
 from pathlib import Path
@@ -10,12 +12,23 @@ from pathlib import Path
 from api.collection.problems import get_problem
 from api.collection.solutions import get_candidate_solution, get_solutions
 from api.collection.test_sets import get_test_sets
-from api.execution.execute_cpp import CompileError, compile_cpp, run_cpp_file
+from api.config import get_settings
+from api.execution.compare import compare_outputs
+from api.execution.cores import dedicated_core
+from api.execution.execute_cpp import (
+    CompileError,
+    compile_all,
+    compile_cpp,
+    run_cpp_file,
+)
 from api.execution.execute_python import run_python_file
+from api.execution.profiles import ResourceProfile
 from api.execution.run_interactive import run_interactive_testcase
 from api.execution.run_validators import run_output_validator_standard
-from api.jobs import update_job
+from api.jobs import profile_path, transcript_path, update_job
 from api.models.problem import (
+    CompileResult,
+    InteractionStats,
     RunSolutionRequest,
     RunSolutionResponse,
     RunSolutionsResponse,
@@ -25,7 +38,6 @@ from api.models.problem import (
     Verdict,
 )
 
-
 _FLUSH_INTERVAL = 0.5  # seconds between partial result writes
 
 
@@ -34,7 +46,8 @@ def run_solutions_job(
 ) -> None:
     """
     Background task: runs all applicable validators and streams partial results
-    into the job cache file roughly every _FLUSH_INTERVAL seconds.
+    into the job cache file roughly every _FLUSH_INTERVAL seconds. The
+    resource usage of every test run is saved as the job's profile.
 
     Intended to be registered with FastAPI BackgroundTasks:
 
@@ -48,6 +61,20 @@ def run_solutions_job(
         test_sets = get_test_sets(problem_path)
 
         results = RunSolutionsResponse(solutions=[], status=None)
+        profile = ResourceProfile()
+
+        # Compile phase: build every C++ source (including the candidate used
+        # for missing .out files) in parallel before any test runs.
+        to_compile = [s for s in solutions if s.path in req.solution_paths]
+        try:
+            candidate = get_candidate_solution(problem_path)
+            if candidate.path not in req.solution_paths:
+                to_compile.append(candidate)
+        except ValueError:
+            pass
+        results.compile = compile_solutions(problem_path, to_compile)
+        compile_errors = {c.source: c.error for c in results.compile if not c.success}
+        update_job(job_id, result=results.model_dump())
         last_flush = time.monotonic()
 
         failed_expectations = False
@@ -66,9 +93,33 @@ def run_solutions_job(
                     if (not req.test_set) or req.test_set == test_set:
                         set_verdicts = []
                         for test_case in test_set.test_cases:
-                            verdict = run_individual_testcase(
-                                problem_path, problem, solution, test_case
-                            )
+                            if solution.path in compile_errors:
+                                verdict = Verdict(
+                                    test_case=test_case.name,
+                                    test_set=test_case.set_name,
+                                    verdict="CE",
+                                    time_ms=0,
+                                    comment=compile_errors[solution.path],
+                                )
+                            else:
+                                transcript = None
+                                if req.record_transcripts:
+                                    transcript = transcript_path(
+                                        job_id,
+                                        solution.path,
+                                        test_case.set_name,
+                                        test_case.name,
+                                    )
+                                with dedicated_core() as cpu_affinity:
+                                    verdict = run_individual_testcase(
+                                        problem_path,
+                                        problem,
+                                        solution,
+                                        test_case,
+                                        transcript_path=transcript,
+                                        cpu_affinity=cpu_affinity,
+                                    )
+                                profile.add(solution.path, verdict)
                             results.solutions[-1].verdicts.append(verdict)
                             set_verdicts.append(verdict)
 
@@ -112,6 +163,7 @@ def run_solutions_job(
                     )
                     last_flush = now
 
+        profile.save(profile_path(job_id))
         update_job(
             job_id,
             status="failed" if failed_expectations else "done",
@@ -126,23 +178,69 @@ def run_solutions_job(
         raise
 
 
+def compile_solutions(
+    problem_path: Path, solutions: list[Solution]
+) -> list[CompileResult]:
+    """Compile all C++ solutions in parallel, reporting one result per source."""
+    cpp_solutions = [s for s in solutions if s.language == "cpp"]
+    compiled = compile_all([s.full_path(problem_path) for s in cpp_solutions])
+    results = []
+    for solution in cpp_solutions:
+        elapsed, error = compiled[solution.full_path(problem_path)]
+        results.append(
+            CompileResult(
+                source=solution.path,
+                success=error is None,
+                time_ms=elapsed * 1000,
+                error=error.stderr if error else "",
+            )
+        )
+    return results
+
+
 def output_individual_testcase(
-    problem_path: Path, problem: Problem, solution: Solution, test_case: TestCase
+    problem_path: Path,
+    problem: Problem,
+    solution: Solution,
+    test_case: TestCase,
+    cpu_affinity: set[int] | None = None,
+    timeout_sec: float | None = None,
+):
+    """Run *solution* on *test_case*, killing it after *timeout_sec*
+    (default: the problem's time limit)."""
+    if timeout_sec is None:
+        timeout_sec = problem.config.limits.time
+    return run_solution_file(
+        problem_path,
+        solution,
+        test_case.full_path(problem_path),
+        timeout_sec,
+        cpu_affinity=cpu_affinity,
+    )
+
+
+def run_solution_file(
+    problem_path: Path,
+    solution: Solution,
+    input_path: Path,
+    timeout_sec: float,
+    cpu_affinity: set[int] | None = None,
 ):
+    """Run *solution* with *input_path* as its stdin."""
     if solution.language == "python":
-        result = run_python_file(
+        return run_python_file(
             solution.full_path(problem_path),
-            test_case.full_path(problem_path),
-            problem.config.limits.time,
+            input_path,
+            timeout_sec,
+            cpu_affinity=cpu_affinity,
         )
-        return result
     elif solution.language == "cpp":
-        result = run_cpp_file(
+        return run_cpp_file(
             solution.full_path(problem_path),
-            test_case.full_path(problem_path),
-            problem.config.limits.time,
+            input_path,
+            timeout_sec,
+            cpu_affinity=cpu_affinity,
         )
-        return result
     else:
         raise NotImplementedError(f"Unsupported language: {solution.language}")
 
@@ -160,9 +258,17 @@ def _solution_cmd(problem_path: Path, solution: Solution) -> list[str]:
 
 
 def run_interactive_testcase_verdict(
-    problem_path: Path, problem: Problem, solution: Solution, test_case: TestCase
+    problem_path: Path,
+    problem: Problem,
+    solution: Solution,
+    test_case: TestCase,
+    transcript_path: Path | None = None,
+    cpu_affinity: set[int] | None = None,
 ) -> Verdict:
-    """Run an interactive testcase using the DMOJ-style grader."""
+    """
+    Run an interactive testcase using the DMOJ-style grader, recording the
+    exchange to *transcript_path* if given.
+    """
     judge = problem.validators.output
     if judge is None or judge.type != "judge":
         return Verdict(
@@ -175,7 +281,6 @@ def run_interactive_testcase_verdict(
 
     judge_path = judge.full_path(problem_path)
     in_path = test_case.full_path(problem_path)
-    input_data = in_path.read_text() if in_path.exists() else ""
 
     points = 100
 
@@ -190,15 +295,16 @@ def run_interactive_testcase_verdict(
             comment=e.stderr,
         )
 
-    start = time.monotonic()
     try:
         result = run_interactive_testcase(
             problem_path=problem_path,
             judge_path=judge_path,
             solution_cmd=cmd,
-            input_data=input_data,
+            input_path=in_path,
             points=points,
             timeout_sec=problem.config.limits.time,
+            transcript_path=transcript_path,
+            cpu_affinity=cpu_affinity,
         )
     except Exception as e:
         import traceback
@@ -210,27 +316,123 @@ def run_interactive_testcase_verdict(
             time_ms=0,
             comment=f"Judge error: {e} {traceback.format_exc()}",
         )
-    elapsed_ms = (time.monotonic() - start) * 1000
 
     return Verdict(
         test_case=test_case.name,
         test_set=test_case.set_name,
         verdict=result.verdict,
-        time_ms=elapsed_ms,
+        time_ms=result.cpu_ms,
+        cpu_ms=result.cpu_ms,
+        max_rss_kb=result.max_rss_kb,
+        output_bytes=result.output_bytes,
         comment=result.comment,
+        interaction=InteractionStats(
+            wall_ms=result.wall_ms,
+            exchanges=result.exchanges,
+            mean_latency_ms=result.mean_latency_ms,
+            max_latency_ms=result.max_latency_ms,
+        ),
+        transcript=transcript_path is not None and transcript_path.exists(),
     )
 
 
 def run_individual_testcase(
-    problem_path: Path, problem: Problem, solution: Solution, test_case: TestCase
-):
+    problem_path: Path,
+    problem: Problem,
+    solution: Solution,
+    test_case: TestCase,
+    transcript_path: Path | None = None,
+    cpu_affinity: set[int] | None = None,
+) -> Verdict:
+    """
+    Run *solution* on one test case and judge it.
+
+    Verdicts whose time lands within Settings.borderline_margin of the time
+    limit, on either side, are borderline. Borderline AC and TLE verdicts
+    are re-run Settings.borderline_reruns more times, and the attempt with
+    the minimum (or median, per Settings.borderline_aggregate) time is kept,
+    together with its transcript.
+    """
+    settings = get_settings()
+    limit_ms = problem.config.limits.time * 1000
+    margin = settings.borderline_margin
+
+    def _is_borderline(verdict: Verdict) -> bool:
+        # A run killed on timeout ran past limit * (1 + margin), however its
+        # time_ms rounds
+        return (
+            not verdict.killed
+            and verdict.time_ms is not None
+            and limit_ms * (1 - margin) <= verdict.time_ms < limit_ms * (1 + margin)
+        )
+
+    def _attempt_transcript(attempt: int) -> Path | None:
+        """Reruns record next to the final transcript until one is kept."""
+        if transcript_path is None or attempt == 0:
+            return transcript_path
+        return transcript_path.with_name(f".{transcript_path.name}.{attempt}")
+
+    first = _judge_testcase(
+        problem_path, problem, solution, test_case, transcript_path, cpu_affinity
+    )
+    attempts = [(first, transcript_path)]
+    if first.verdict in ("AC", "TLE") and _is_borderline(first):
+        for attempt in range(1, settings.borderline_reruns + 1):
+            path = _attempt_transcript(attempt)
+            attempts.append(
+                (
+                    _judge_testcase(
+                        problem_path, problem, solution, test_case, path, cpu_affinity
+                    ),
+                    path,
+                )
+            )
+    attempts.sort(key=lambda attempt: attempt[0].time_ms or 0)
+    if settings.borderline_aggregate == "median":
+        verdict, kept = attempts[(len(attempts) - 1) // 2]
+    else:
+        verdict, kept = attempts[0]
+
+    # Keep the transcript of the attempt whose verdict is reported
+    if transcript_path is not None:
+        if kept != transcript_path:
+            transcript_path.unlink(missing_ok=True)
+            if verdict.transcript:
+                os.replace(kept, transcript_path)
+        for _, path in attempts:
+            if path != transcript_path:
+                path.unlink(missing_ok=True)
+
+    verdict.attempts = len(attempts)
+    verdict.borderline = _is_borderline(verdict)
+    return verdict
+
+
+def _judge_testcase(
+    problem_path: Path,
+    problem: Problem,
+    solution: Solution,
+    test_case: TestCase,
+    transcript_path: Path | None,
+    cpu_affinity: set[int] | None,
+) -> Verdict:
     if problem.config.type == "interactive":
         return run_interactive_testcase_verdict(
-            problem_path, problem, solution, test_case
+            problem_path, problem, solution, test_case, transcript_path, cpu_affinity
         )
-    # Get solution output
+    # Get solution output. Runs get some slack past the limit so that a
+    # narrow TLE is measured rather than cut off.
+    limit_ms = problem.config.limits.time * 1000
+    slack = 1 + get_settings().borderline_margin
     try:
-        result = output_individual_testcase(problem_path, problem, solution, test_case)
+        result = output_individual_testcase(
+            problem_path,
+            problem,
+            solution,
+            test_case,
+            cpu_affinity,
+            timeout_sec=problem.config.limits.time * slack,
+        )
     except CompileError as e:
         return Verdict(
             test_case=test_case.name,
@@ -239,37 +441,52 @@ def run_individual_testcase(
             time_ms=0,
             comment=e.stderr,
         )
-    except TimeoutExpired:
+    except TimeoutExpired as e:
         return Verdict(
             test_case=test_case.name,
             test_set=test_case.set_name,
             verdict="TLE",
-            time_ms=0,  # TODO
+            time_ms=e.timeout * 1000,  # killed at the timeout; a lower bound
             comment="Time Limit Exceeded",
+            killed=True,
+        )
+    time_ms = result.time_ms
+    usage = dict(
+        cpu_ms=result.cpu_ms,
+        max_rss_kb=result.max_rss_kb,
+        output_bytes=result.output_bytes,
+    )
+    if time_ms > limit_ms:
+        return Verdict(
+            test_case=test_case.name,
+            test_set=test_case.set_name,
+            verdict="TLE",
+            time_ms=time_ms,
+            comment="Time Limit Exceeded",
+            **usage,
         )
     if result.exit_code != 0:
         return Verdict(
             test_case=test_case.name,
             test_set=test_case.set_name,
             verdict="RTE",
-            time_ms=0,  # TODO
+            time_ms=time_ms,
             comment=result.stderr,
+            **usage,
         )
     # Get expected output: prefer cached .out file, fall back to running candidate
     in_path = test_case.full_path(problem_path)
     out_path = in_path.with_suffix(".out")
-    if out_path.exists():
-        expected_stdout = out_path.read_text().rstrip("\n")
-    else:
+    if not out_path.exists():
         judge_sol = get_candidate_solution(problem_path)
         judge_result = output_individual_testcase(
             problem_path, problem, judge_sol, test_case
         )
-        expected_stdout = judge_result.stdout
         # Cache the output for future runs
-        out_path.write_text(expected_stdout.strip() + "\n")
+        out_path.write_text(judge_result.stdout.strip() + "\n")
     if problem.validators.output:
         # Output validator, check against the result output.
+        expected_stdout = out_path.read_text().rstrip("\n")
         result = run_output_validator_standard(
             problem_path,
             problem.validators.output,
@@ -281,16 +498,23 @@ def run_individual_testcase(
             test_case=test_case.name,
             test_set=test_case.set_name,
             verdict="AC" if result.passed else "WA",
-            time_ms=0,  # TODO
+            time_ms=time_ms,
             comment=result.error,
+            **usage,
         )
     else:
-        # Just do diff
-        same = result.stdout.strip() == expected_stdout.strip()
+        # Built-in comparison, streamed against the cached .out file
+        with open(out_path) as expected:
+            comparison = compare_outputs(
+                io.StringIO(result.stdout),
+                expected,
+                problem.config.output_comparison,
+            )
         return Verdict(
             test_case=test_case.name,
             test_set=test_case.set_name,
-            verdict="AC" if same else "WA",
-            time_ms=0,  # TODO
-            comment="",
+            verdict="AC" if comparison.same else "WA",
+            time_ms=time_ms,
+            comment=comparison.comment,
+            **usage,
         )
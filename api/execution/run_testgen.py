@@ -1,4 +1,5 @@
 import logging
+import tempfile
 from pathlib import Path
 
 from api.collection.test_sets import delete_test_case, get_test_generators, get_test_set
@@ -47,11 +48,13 @@ def run_testgen_job(
                     result=results,
                 )
 
-                # Remove all files generated by this generator
-                remove_testgen_files(problem_path, generator)
-
                 try:
-                    res = run_individual_testgen(problem_path, generator)
+                    res, produced = run_individual_testgen(
+                        problem_path, generator, req.seed
+                    )
+                    # Cases are rewritten in place (and left alone if
+                    # unchanged); remove the ones this run no longer makes.
+                    remove_testgen_files(problem_path, generator, keep=produced)
                     results[-1]["status"] = "COMPLETE"
                     results[-1]["output"] = res.stdout
                 except Exception as e:
@@ -81,18 +84,42 @@ def run_testgen_job(
         raise
 
 
-def remove_testgen_files(problem_path: Path, test_generator: TestGenerator):
+def remove_testgen_files(
+    problem_path: Path, test_generator: TestGenerator, keep: set[Path] = frozenset()
+):
     test_set = get_test_set(problem_path, test_generator.test_set)
     for case in test_set.test_cases:
-        if case.generated_by == str(test_generator.relative_path()):
+        if (
+            case.generated_by == str(test_generator.relative_path())
+            and case.full_path(problem_path).resolve() not in keep
+        ):
             # Delete the case
             delete_test_case(problem_path, case.set_name, case.name)
 
 
-def run_individual_testgen(problem_path: Path, test_generator: TestGenerator):
+def run_individual_testgen(
+    problem_path: Path, test_generator: TestGenerator, seed: int | None = None
+):
+    """
+    Run a generator. Returns its result and the .in files it wrote through
+    testlibpy.test_case, which reports them in the TESTLIBPY_MANIFEST file.
+    *seed* is passed on as the global seed for the cases' seeds.
+    """
     generator_file = test_generator.full_path(problem_path)
 
-    res = run_python_file(generator_file, None, timeout_sec=None)
-    if res.exit_code != 0:
-        raise ValueError(res.stderr)
-    return res
+    env = {} if seed is None else {"TESTLIBPY_SEED": str(seed)}
+    with tempfile.NamedTemporaryFile(prefix="gm-testgen-") as manifest:
+        res = run_python_file(
+            generator_file,
+            None,
+            timeout_sec=None,
+            TESTLIBPY_MANIFEST=manifest.name,
+            **env,
+        )
+        if res.exit_code != 0:
+            raise ValueError(res.stderr)
+        produced = {
+            Path(line).resolve()
+            for line in Path(manifest.name).read_text().splitlines()
+        }
+    return res, produced
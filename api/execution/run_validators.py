@@ -99,8 +99,28 @@ def run_output_validator_standard(
     process_output: str,
     judge_output: str,
 ) -> ValidatorResult:
-    validator_path = validator.full_path(problem_path)
     input_data = test_case.full_path(problem_path).read_text()
+    passed, comment = check_output(
+        problem_path, validator, input_data, process_output, judge_output
+    )
+    return ValidatorResult(
+        validator=validator.path,
+        test_case=test_case.name,
+        test_set=test_case.set_name,
+        passed=passed,
+        error="" if passed else comment,
+    )
+
+
+def check_output(
+    problem_path: Path,
+    validator: OutputValidator,
+    input_data: str,
+    process_output: str,
+    judge_output: str,
+) -> tuple[bool, str]:
+    """Run the checker's judge() on one output; return (accepted, comment)."""
+    validator_path = validator.full_path(problem_path)
 
     def capturing_make_result(code: str, points: float, comment: str) -> None:
         return [code, points, comment]
@@ -122,10 +142,4 @@ def run_output_validator_standard(
     else:
         code, points, comment = "WA", 0.0, "Checker did not return result"
 
-    return ValidatorResult(
-        validator=validator.path,
-        test_case=test_case.name,
-        test_set=test_case.set_name,
-        passed=(code == "AC"),
-        error="" if code == "AC" else comment,
-    )
+    return code == "AC", comment
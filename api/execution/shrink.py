@@ -0,0 +1,204 @@
+"""
+Shrink a failing test case to a smaller input that still fails.
+
+Starting from a test case on which a solution disagrees with the candidate
+solution, a shrinker proposes reductions of the input (see testlibpy.shrink):
+the problem's own ``shrink`` from ``stress/<shrinker>`` if one is named,
+otherwise testlibpy.shrink.default_shrink, which drops chunks of lines and
+tokens delta-debugging style and then reduces numbers. A reduction is kept if
+the input validators accept it and the solution still disagrees with the
+candidate on it; the shrinker is then asked for reductions of the new input,
+until none of its proposals fails or max_evaluations is reached.
+
+Proposals are evaluated ``workers`` at a time in parallel, and the first
+failing one in the shrinker's order is kept, so the result does not depend on
+which run finishes first. The smallest input is saved as a new test case with
+the candidate's output; if no reduction still fails, the job fails instead of
+saving a copy of the original. Existing test cases are never overwritten.
+"""
+
+import hashlib
+import itertools
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from api.collection.problems import get_problem
+from api.collection.test_sets import get_test_set
+from api.execution.cores import dedicated_core
+from api.execution.stress import (
+    CandidateError,
+    check_input,
+    judge_against_candidate,
+    load_stress_hook,
+    save_test_case,
+    stress_solutions,
+    test_case_exists,
+    unused_case_name,
+)
+from api.jobs import update_job
+from api.models.problem import ShrinkTestRequest, ShrinkTestResult
+from testlibpy.shrink import default_shrink
+
+_FLUSH_INTERVAL = 0.5
+
+
+def _smaller(candidate: str, current: str) -> bool:
+    """Shorter, or as long and earlier in string order (so shrinking ends)."""
+    return (len(candidate), candidate) < (len(current), current)
+
+
+def shrink_test_job(
+    problem_path: Path, problem_slug: str, req: ShrinkTestRequest, job_id: str
+) -> None:
+    """
+    Background task: shrink req.test_case while req.solution_path keeps
+    disagreeing with the candidate solution on it, reporting a
+    ShrinkTestResult as the job result throughout.
+    """
+    try:
+        update_job(job_id, status="running")
+
+        problem = get_problem(problem_path.parent, problem_slug)
+        if problem.config.type == "interactive":
+            raise ValueError("Shrinking is not supported for interactive problems")
+        test_case = next(
+            (
+                tc
+                for tc in get_test_set(problem_path, req.test_set).test_cases
+                if tc.name == req.test_case
+            ),
+            None,
+        )
+        if test_case is None:
+            raise ValueError(f"Test case {req.test_set}/{req.test_case} does not exist")
+        target_set = req.target_set or req.test_set
+        get_test_set(problem_path, target_set)  # must exist
+        if req.case_name and test_case_exists(problem_path, target_set, req.case_name):
+            raise ValueError(f"Test case {target_set}/{req.case_name} already exists")
+
+        solution, candidate = stress_solutions(problem_path, req.solution_path)
+        shrink = (
+            load_stress_hook(problem_path, req.shrinker, "shrink")
+            if req.shrinker
+            else default_shrink
+        )
+        time_limit = req.time_limit or problem.config.limits.time
+        workers = req.workers or os.cpu_count() or 1
+
+        def _fails(input_data: str, input_path: Path):
+            """(expected output, (verdict, comment)) if the input still fails."""
+            input_path.write_text(input_data)
+            if check_input(problem_path, problem, input_path, target_set) is not None:
+                return None
+            with dedicated_core() as cpu_affinity:
+                try:
+                    expected, found = judge_against_candidate(
+                        problem_path,
+                        problem,
+                        solution,
+                        candidate,
+                        input_path,
+                        time_limit,
+                        cpu_affinity,
+                    )
+                except CandidateError:
+                    return None
+            return (expected, found) if found else None
+
+        start = time.monotonic()
+        original = test_case.full_path(problem_path).read_text()
+        current = original
+        tried: set[bytes] = set()
+
+        with tempfile.TemporaryDirectory(prefix="gm-shrink-") as scratch:
+            paths = [Path(scratch) / f"{i}.in" for i in range(workers)]
+            failure = _fails(original, paths[0])
+            if failure is None:
+                raise ValueError(
+                    f"{solution.path} does not fail {req.test_set}/{req.test_case}"
+                )
+            evaluations = 1
+            last_flush = time.monotonic()
+
+            def _result() -> ShrinkTestResult:
+                return ShrinkTestResult(
+                    evaluations=evaluations,
+                    elapsed_sec=time.monotonic() - start,
+                    original_bytes=len(original.encode()),
+                    original_lines=original.count("\n"),
+                    shrunk_bytes=len(current.encode()),
+                    shrunk_lines=current.count("\n"),
+                    verdict=failure[1][0],
+                    comment=failure[1][1],
+                )
+
+            def _untried(candidate: str) -> bool:
+                digest = hashlib.sha1(candidate.encode()).digest()
+                if digest in tried:
+                    return False
+                tried.add(digest)
+                return True
+
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                shrunk = True
+                while shrunk and evaluations < req.max_evaluations:
+                    shrunk = False
+                    proposals = (
+                        c
+                        for c in shrink(current)
+                        if _smaller(c, current) and _untried(c)
+                    )
+                    while not shrunk and evaluations < req.max_evaluations:
+                        batch = list(
+                            itertools.islice(
+                                proposals,
+                                min(workers, req.max_evaluations - evaluations),
+                            )
+                        )
+                        if not batch:
+                            break
+                        results = list(pool.map(_fails, batch, paths))
+                        evaluations += len(batch)
+                        for proposal, result in zip(batch, results):
+                            if result is not None:
+                                current, failure = proposal, result
+                                shrunk = True
+                                break
+
+                        now = time.monotonic()
+                        if now - last_flush >= _FLUSH_INTERVAL:
+                            update_job(job_id, result=_result().model_dump())
+                            last_flush = now
+
+        result = _result()
+        if current == original:
+            update_job(job_id, result=result.model_dump())
+            raise ValueError(
+                f"Could not shrink {req.test_set}/{req.test_case}: no smaller input "
+                f"still fails after {evaluations} evaluations"
+            )
+        name = req.case_name or unused_case_name(
+            problem_path, target_set, f"{req.test_case}-min"
+        )
+        save_test_case(
+            problem_path,
+            target_set,
+            name,
+            current,
+            failure[0],
+            description=f"{req.test_set}/{req.test_case} shrunk for {solution.path}",
+        )
+        result.test_set = target_set
+        result.test_case = name
+        update_job(job_id, status="done", result=result.model_dump())
+
+    except Exception as exc:
+        import traceback
+
+        logging.error(traceback.format_exc())
+        update_job(job_id, status="failed", error=str(exc))
+        raise
@@ -0,0 +1,348 @@
+"""
+Stress-test a solution against the candidate solution on generated inputs.
+
+A stress generator is a Python file under ``<problem>/stress/`` defining
+``generate(seed: int) -> str``, which returns one (small) input. It is loaded
+into the API process once and called with consecutive seeds, so producing an
+input costs a function call rather than a process. Both solutions are run on
+every input through the usual runners: Python forks from the warm zygote and
+C++ is compiled once up front. Several workers run seeds in parallel.
+
+Outputs are compared with the problem's checker if it has one, otherwise with
+its output_comparison. The job stops at the first mismatch: seeds are handed
+out in order and every seed below a mismatch is still finished, so the
+reported counterexample is always the lowest failing seed, however the work
+was interleaved. The input is checked against the input validators that
+apply to the target test set and saved there together with the candidate's
+output and a sidecar naming the generator and seed. Existing test cases are never overwritten: an
+explicit case_name that is taken is refused, and the default name gets a
+numeric suffix.
+"""
+
+import importlib.util
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from pathlib import Path
+from subprocess import TimeoutExpired
+from typing import Callable
+
+import yaml
+
+from api.collection.problems import get_problem
+from api.collection.solutions import get_candidate_solution, get_solutions
+from api.collection.test_sets import get_test_set
+from api.execution.compare import compare_outputs
+from api.execution.cores import dedicated_core
+from api.execution.execute_python import run_python_file
+from api.execution.run_testcase import compile_solutions, run_solution_file
+from api.execution.run_validators import check_output
+from api.jobs import update_job
+from api.models.problem import (
+    Problem,
+    Solution,
+    StressCounterexample,
+    StressTestRequest,
+    StressTestResult,
+)
+from api.utils.list_matching import filter_list_matches_test_set
+
+_FLUSH_INTERVAL = 0.5
+
+
+def load_stress_hook(problem_path: Path, filename: str, name: str) -> Callable:
+    """Import ``stress/<filename>`` and return its function *name*."""
+    path = problem_path / "stress" / filename
+    if not path.is_file():
+        raise ValueError(f"stress/{filename} does not exist")
+    spec = importlib.util.spec_from_file_location(f"_stress_{name}", path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    hook = getattr(module, name, None)
+    if not callable(hook):
+        raise ValueError(f"stress/{filename} does not define {name}()")
+    return hook
+
+
+class CandidateError(Exception):
+    """The candidate solution failed on an input, so it cannot be judged."""
+
+
+def _compare(
+    problem_path: Path, problem: Problem, input_data: str, output: str, expected: str
+) -> tuple[bool, str]:
+    if problem.validators.output:
+        return check_output(
+            problem_path,
+            problem.validators.output,
+            input_data,
+            output,
+            expected.rstrip("\n"),
+        )
+    comparison = compare_outputs(
+        io.StringIO(output), io.StringIO(expected), problem.config.output_comparison
+    )
+    return comparison.same, comparison.comment
+
+
+def judge_against_candidate(
+    problem_path: Path,
+    problem: Problem,
+    solution: Solution,
+    candidate: Solution,
+    input_path: Path,
+    time_limit: float,
+    cpu_affinity: set[int] | None = None,
+) -> tuple[str, tuple[str, str] | None]:
+    """
+    Run *candidate* and *solution* on *input_path*. Return the candidate's
+    output, and (verdict, comment) if *solution* disagrees with it.
+
+    Raises CandidateError if the candidate fails or times out.
+    """
+    try:
+        expected = run_solution_file(
+            problem_path, candidate, input_path, time_limit, cpu_affinity
+        )
+    except TimeoutExpired:
+        raise CandidateError(f"Candidate {candidate.path} timed out")
+    if expected.exit_code != 0:
+        raise CandidateError(f"Candidate {candidate.path} failed:\n{expected.stderr}")
+    try:
+        result = run_solution_file(
+            problem_path, solution, input_path, time_limit, cpu_affinity
+        )
+    except TimeoutExpired:
+        return expected.stdout, ("TLE", "Time Limit Exceeded")
+    if result.exit_code != 0:
+        return expected.stdout, ("RTE", result.stderr)
+    same, comment = _compare(
+        problem_path, problem, input_path.read_text(), result.stdout, expected.stdout
+    )
+    return expected.stdout, None if same else ("WA", comment)
+
+
+def check_input(
+    problem_path: Path, problem: Problem, input_path: Path, test_set: str
+) -> str | None:
+    """
+    Return why an input validator that checks *test_set* rejects
+    *input_path* (including by timing out), or None if none do.
+    """
+    for validator in problem.validators.input:
+        if not filter_list_matches_test_set(validator.checks, test_set):
+            continue
+        try:
+            result = run_python_file(
+                validator.full_path(problem_path), input_path, timeout_sec=5
+            )
+        except TimeoutExpired:
+            return f"{validator.path}: timed out after 5s"
+        if result.exit_code != 0:
+            return f"{validator.path}:\n{result.stderr}"
+    return None
+
+
+def stress_solutions(
+    problem_path: Path, solution_path: str
+) -> tuple[Solution, Solution]:
+    """Return the solution at *solution_path* and the candidate, compiled."""
+    solution = next(
+        (s for s in get_solutions(problem_path) if s.path == solution_path),
+        None,
+    )
+    if solution is None:
+        raise ValueError(f"Solution {solution_path} does not exist")
+    candidate = get_candidate_solution(problem_path)
+    if candidate.path == solution.path:
+        raise ValueError(
+            f"{solution.path} is the candidate solution; pick another to compare"
+        )
+    failed = [
+        c
+        for c in compile_solutions(problem_path, [solution, candidate])
+        if not c.success
+    ]
+    if failed:
+        raise ValueError(f"{failed[0].source} failed to compile:\n{failed[0].error}")
+    return solution, candidate
+
+
+def test_case_exists(problem_path: Path, test_set: str, name: str) -> bool:
+    return (problem_path / "data" / test_set / f"{name}.in").exists()
+
+
+def unused_case_name(problem_path: Path, test_set: str, name: str) -> str:
+    """*name*, or *name* with the first free "-2", "-3", ... suffix."""
+    candidate, suffix = name, 2
+    while test_case_exists(problem_path, test_set, candidate):
+        candidate, suffix = f"{name}-{suffix}", suffix + 1
+    return candidate
+
+
+def save_test_case(
+    problem_path: Path,
+    test_set: str,
+    name: str,
+    input_data: str,
+    expected: str,
+    **sidecar,
+) -> None:
+    """
+    Write a test case with its expected output and sidecar .yaml. Raises
+    ValueError rather than overwrite an existing test case.
+    """
+    if test_case_exists(problem_path, test_set, name):
+        raise ValueError(f"Test case {test_set}/{name} already exists")
+    in_path = problem_path / "data" / test_set / f"{name}.in"
+    in_path.write_text(input_data)
+    in_path.with_suffix(".out").write_text(expected.strip() + "\n")
+    in_path.with_suffix(".yaml").write_text(
+        yaml.dump(sidecar, default_flow_style=False, allow_unicode=True)
+    )
+
+
+def stress_test_job(
+    problem_path: Path, problem_slug: str, req: StressTestRequest, job_id: str
+) -> None:
+    """
+    Background task: run req.solution_path and the candidate solution on
+    generated inputs until they disagree or req.max_iterations seeds have
+    been tried, reporting a StressTestResult as the job result throughout.
+    """
+    try:
+        update_job(job_id, status="running")
+
+        problem = get_problem(problem_path.parent, problem_slug)
+        if problem.config.type == "interactive":
+            raise ValueError("Stress testing is not supported for interactive problems")
+        get_test_set(problem_path, req.target_set)  # must exist
+        if req.case_name and test_case_exists(
+            problem_path, req.target_set, req.case_name
+        ):
+            raise ValueError(
+                f"Test case {req.target_set}/{req.case_name} already exists"
+            )
+
+        solution, candidate = stress_solutions(problem_path, req.solution_path)
+
+        generate = load_stress_hook(problem_path, req.generator, "generate")
+        time_limit = req.time_limit or problem.config.limits.time
+        workers = req.workers or os.cpu_count() or 1
+        end_seed = req.start_seed + req.max_iterations
+
+        lock = threading.Lock()
+        generate_lock = threading.Lock()  # generators may use global state
+        next_seed = req.start_seed
+        iterations = 0
+        # (seed, input, expected output, verdict, comment) of the lowest mismatch
+        mismatch: tuple[int, str, str, str, str] | None = None
+
+        def _take_seed() -> int | None:
+            nonlocal next_seed
+            with lock:
+                if mismatch is not None or next_seed >= end_seed:
+                    return None
+                seed = next_seed
+                next_seed += 1
+                return seed
+
+        def _worker(input_path: Path) -> None:
+            nonlocal iterations, mismatch
+            while (seed := _take_seed()) is not None:
+                with generate_lock:
+                    input_data = generate(seed)
+                input_path.write_text(input_data)
+
+                with dedicated_core() as cpu_affinity:
+                    try:
+                        expected, found = judge_against_candidate(
+                            problem_path,
+                            problem,
+                            solution,
+                            candidate,
+                            input_path,
+                            time_limit,
+                            cpu_affinity,
+                        )
+                    except CandidateError as e:
+                        raise ValueError(f"{e}\n(seed {seed})")
+
+                with lock:
+                    iterations += 1
+                    if found and (mismatch is None or seed < mismatch[0]):
+                        mismatch = (seed, input_data, expected, *found)
+
+        start = time.monotonic()
+
+        def _result() -> StressTestResult:
+            return StressTestResult(
+                iterations=iterations, elapsed_sec=time.monotonic() - start
+            )
+
+        with tempfile.TemporaryDirectory(prefix="gm-stress-") as scratch:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_worker, Path(scratch) / f"{i}.in")
+                    for i in range(workers)
+                ]
+                try:
+                    while True:
+                        done, pending = wait(
+                            futures,
+                            timeout=_FLUSH_INTERVAL,
+                            return_when=FIRST_EXCEPTION,
+                        )
+                        for future in done:
+                            future.result()  # re-raise a worker's error
+                        if not pending:
+                            break
+                        update_job(job_id, result=_result().model_dump())
+                except BaseException:
+                    with lock:
+                        next_seed = end_seed  # stop the other workers
+                    raise
+
+        result = _result()
+        if mismatch is not None:
+            seed, input_data, expected, verdict, comment = mismatch
+            # Validate before anything is written to the test set
+            with tempfile.TemporaryDirectory(prefix="gm-stress-") as scratch:
+                input_path = Path(scratch) / "counterexample.in"
+                input_path.write_text(input_data)
+                error = check_input(problem_path, problem, input_path, req.target_set)
+            if error is not None:
+                raise ValueError(f"Input from seed {seed} was rejected by {error}")
+            name = req.case_name or unused_case_name(
+                problem_path, req.target_set, f"stress-{seed}"
+            )
+            save_test_case(
+                problem_path,
+                req.target_set,
+                name,
+                input_data,
+                expected,
+                description=f"Stress counterexample for {solution.path}",
+                generated_by=f"stress/{req.generator}",
+                seed=seed,
+            )
+            result.counterexample = StressCounterexample(
+                seed=seed,
+                test_set=req.target_set,
+                test_case=name,
+                verdict=verdict,
+                comment=comment,
+            )
+        update_job(job_id, status="done", result=result.model_dump())
+
+    except Exception as exc:
+        import traceback
+
+        logging.error(traceback.format_exc())
+        update_job(job_id, status="failed", error=str(exc))
+        raise
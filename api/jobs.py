@@ -10,6 +10,7 @@ multiple times before the job reaches a terminal status.
 
 from __future__ import annotations
 
+import shutil
 import time
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
@@ -28,6 +29,9 @@ class JobType:
     GENERATE_TESTS = "generate_tests"
     RUN_VALIDATORS = "run_validators"
     RUN_SOLUTION = "run_solution"
+    CALIBRATE_TIME_LIMIT = "calibrate_time_limit"
+    STRESS_TEST = "stress_test"
+    SHRINK_TEST = "shrink_test"
     GENERATE_OUTPUT = "generate_output"
     EXPORT = "export"
     REVIEW_DETERMINISTIC = "review-deterministic"
@@ -47,6 +51,10 @@ def _job_path(job_id: str) -> Path:
     return _cache_root() / f"{job_id}.yaml"
 
 
+def _transcripts_dir(job_id: str) -> Path:
+    return _cache_root() / "transcripts" / job_id
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -176,6 +184,23 @@ def get_latest_individual_job_id(slug: str, solution_path: str) -> str | None:
     return f"{slug}/{JobType.RUN_SOLUTION}/{key}/{files[-1].stem}"
 
 
+def transcript_path(
+    job_id: str, solution_path: str, test_set: str, test_case: str
+) -> Path:
+    """Where the interaction transcript of one test case of a job is stored.
+
+    Transcripts live outside the job tree, under
+    {cache_root}/transcripts/{job_id}/{solution_key}/{test_set}/{test_case}.jsonl.gz
+    """
+    key = _solution_key(solution_path)
+    return _transcripts_dir(job_id) / key / test_set / f"{test_case}.jsonl.gz"
+
+
+def profile_path(job_id: str) -> Path:
+    """Where the per-test resource profile of a run_solution job is stored."""
+    return _cache_root() / "profiles" / f"{job_id}.zip"
+
+
 def list_individual_solution_keys(slug: str) -> list[str]:
     """Return encoded keys for all solutions that have a cached individual run."""
     run_dir = _cache_root() / slug / JobType.RUN_SOLUTION
@@ -213,9 +238,10 @@ class JobTask:
 
 
 def purge_stale_jobs() -> int:
-    """Delete all but the latest job file in each {slug}/{type}/ folder.
+    """Delete all but the latest job file in each {slug}/{type}/ folder,
+    along with any transcripts and profiles recorded by the deleted jobs.
 
-    Returns the count of files removed.
+    Returns the count of job files removed.
     """
     root = _cache_root()
     deleted = 0
@@ -227,6 +253,9 @@ def purge_stale_jobs() -> int:
         files = sorted(type_dir.glob("*.yaml"), key=lambda p: p.stem)
         for stale in files[:-1]:  # keep only the newest
             stale.unlink(missing_ok=True)
+            job_id = stale.relative_to(root).with_suffix("").as_posix()
+            shutil.rmtree(_transcripts_dir(job_id), ignore_errors=True)
+            profile_path(job_id).unlink(missing_ok=True)
             deleted += 1
     return deleted
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Literal
 from pydantic import BaseModel
 from pathlib import Path
 
@@ -27,6 +27,14 @@ class ProblemLimits(BaseModel):
     memory: int = 262144  # Mem limit in bytes (default 256Mb)
 
 
+class OutputComparison(BaseModel):
+    """How solution output is compared when the problem has no checker."""
+
+    mode: Literal["exact", "token", "line", "float"] = "exact"
+    abs_eps: float = 1e-6  # float mode: absolute tolerance
+    rel_eps: float = 1e-6  # float mode: relative tolerance
+
+
 class ProblemConfig(BaseModel):
     name: str
     type: str  # "standard" | "interactive" | "multi"
@@ -37,6 +45,7 @@ class ProblemConfig(BaseModel):
     state: str  # "draft" | "in-progress" | "review" | "complete" | "archive"
     contests: list[str] | None = None
     limits: ProblemLimits
+    output_comparison: OutputComparison = OutputComparison()
     author: str
     visibility: str = "private"  # "public" | "private"
     external_judge_url: str | None = None
@@ -47,6 +56,7 @@ class TestCase(BaseModel):
     set_name: str
     description: str | None = None
     generated_by: str | None = None
+    seed: int | None = None  # set by testlibpy.test_case
 
     def full_path(self, problem_path: Path):
         return problem_path / "data" / self.set_name / f"{self.name}.in"
@@ -144,6 +154,38 @@ class TestGenerator(BaseModel):
 class RunSolutionRequest(BaseModel):
     solution_paths: list[str]  # relative path, e.g. "complete_ac/sol.py"
     test_set: str | None = None  # None = run all sets
+    record_transcripts: bool = False  # interactive problems only
+
+
+class CalibrateTimeLimitRequest(BaseModel):
+    repeats: int = 5  # runs of every AC-expected solution on every test
+    safety_factor: float = 2.0  # suggested limit / slowest AC time
+    max_time: float = 10  # seconds a single run may take while measuring
+    granularity: float = 0.1  # the suggestion is rounded up to a multiple of this
+    apply: bool = False  # write the suggestion to the problem's config.yaml
+
+
+class StressTestRequest(BaseModel):
+    solution_path: str  # solution under test, relative to solutions/
+    generator: str  # file under stress/ defining generate(seed) -> str
+    target_set: str  # test set the counterexample is saved to
+    case_name: str | None = None  # default: "stress-{seed}"
+    start_seed: int = 0
+    max_iterations: int = 10000
+    workers: int | None = None  # None = one per available core
+    time_limit: float | None = None  # seconds per run; None = limits.time
+
+
+class ShrinkTestRequest(BaseModel):
+    solution_path: str  # failing solution, relative to solutions/
+    test_set: str
+    test_case: str  # stem of the failing case
+    shrinker: str | None = None  # file under stress/ defining shrink(text)
+    target_set: str | None = None  # None = test_set
+    case_name: str | None = None  # default: "{test_case}-min"
+    max_evaluations: int = 2000  # candidate inputs to try at most
+    workers: int | None = None  # None = one per available core
+    time_limit: float | None = None  # seconds per run; None = limits.time
 
 
 class OpenSolutionRequest(BaseModel):
@@ -160,12 +202,27 @@ class OpenTestCaseRequest(BaseModel):
     test_name: str  # stem, e.g. "input1"
 
 
+class InteractionStats(BaseModel):
+    wall_ms: float  # whole interaction, including judge time
+    exchanges: int  # lines read from the solution
+    mean_latency_ms: float  # judge write → solution reply
+    max_latency_ms: float
+
+
 class Verdict(BaseModel):
     test_case: str
     test_set: str
     verdict: str  # "AC" | "WA" | "TLE" | "RE"
     time_ms: float | None = None
+    cpu_ms: float | None = None  # user + system
+    max_rss_kb: int | None = None
+    output_bytes: int | None = None
     comment: str = ""
+    interaction: InteractionStats | None = None  # interactive problems only
+    transcript: bool = False  # a recorded interaction transcript is available
+    borderline: bool = False  # time within Settings.borderline_margin of the limit
+    killed: bool = False  # stopped at its timeout, so time_ms is a lower bound
+    attempts: int = 1  # runs made; borderline verdicts are re-run
 
 
 class RunSolutionResponse(BaseModel):
@@ -175,9 +232,105 @@ class RunSolutionResponse(BaseModel):
     set_consistent: dict[str, str]  # Any errors with set expectation consistency
 
 
+class TimingPercentiles(BaseModel):
+    p50: float
+    p90: float
+    p99: float
+    max: float
+
+
+class SetProfile(BaseModel):
+    solution_path: str
+    test_set: str
+    cases: int
+    time_ms: TimingPercentiles | None
+    cpu_ms: TimingPercentiles | None
+    max_rss_kb: int | None
+    max_output_bytes: int | None
+
+
+class SlowCase(BaseModel):
+    solution_path: str
+    test_set: str
+    test_case: str
+    verdict: str
+    time_ms: float
+    cpu_ms: float | None
+
+
+class SafetyMargin(BaseModel):
+    solution_path: str
+    max_time_ms: float  # slowest accepted case
+    margin: float | None  # time limit / max_time_ms
+
+
+class ProfileReport(BaseModel):
+    job_id: str
+    time_limit_ms: float
+    sets: list[SetProfile]
+    slowest: list[SlowCase]
+    safety_margins: list[SafetyMargin]  # solutions expected to be AC
+
+
+class SolutionTiming(BaseModel):
+    solution_path: str
+    expectation: str  # "AC" | "TLE"
+    runs: int
+    max_ms: float  # slowest case, by median over repeats for AC solutions
+    slowest_case: str  # "{test_set}/{test_case}"
+    unexpected: list[str] = []  # cases whose verdict did not match expectation
+
+
+class TimeLimitCalibration(BaseModel):
+    current_limit: float  # seconds
+    suggested_limit: float | None  # seconds
+    applied: bool = False
+    safety_factor: float  # achieved by suggested_limit over ac_max_ms
+    ac_max_ms: float | None
+    tle_min_ms: float | None  # fastest of the TLE solutions' slowest cases
+    cpu: int | None  # core the runs were pinned to
+    solutions: list[SolutionTiming]
+    warnings: list[str] = []
+
+
+class StressCounterexample(BaseModel):
+    seed: int
+    test_set: str
+    test_case: str  # name of the saved test case
+    verdict: str  # the solution's verdict against the candidate: "WA" | "RTE" | "TLE"
+    comment: str = ""
+
+
+class StressTestResult(BaseModel):
+    iterations: int  # inputs both solutions were run on
+    elapsed_sec: float
+    counterexample: StressCounterexample | None = None
+
+
+class ShrinkTestResult(BaseModel):
+    evaluations: int  # candidate inputs tried
+    elapsed_sec: float
+    original_bytes: int
+    original_lines: int
+    shrunk_bytes: int  # smallest failing input so far
+    shrunk_lines: int
+    verdict: str  # the solution's verdict on the smallest input
+    comment: str = ""
+    test_set: str | None = None  # where the shrunk case was saved, once done
+    test_case: str | None = None
+
+
+class CompileResult(BaseModel):
+    source: str  # relative path within solutions/
+    success: bool
+    time_ms: float
+    error: str = ""
+
+
 class RunSolutionsResponse(BaseModel):
     solutions: list[RunSolutionResponse]
     status: str | None
+    compile: list[CompileResult] = []  # compile phase, run before any tests
 
 
 class RunValidatorsRequest(BaseModel):
@@ -203,6 +356,7 @@ class GenerateTestsRequest(BaseModel):
 
 class GenerateMultipleTestsRequest(BaseModel):
     requests: list[GenerateTestsRequest]
+    seed: int | None = None  # global seed mixed into every test_case seed
 
 
 class ExportRequest(BaseModel):
@@ -231,6 +385,18 @@ class JobStatusResponse(BaseModel):
     error: str | None = None
 
 
+class TranscriptEntry(BaseModel):
+    sender: str  # "judge" | "solution"
+    t_ms: float  # since the start of the interaction
+    line: str
+
+
+class TranscriptResponse(BaseModel):
+    total_lines: int  # lines exchanged in the whole interaction
+    dropped: int  # earliest lines not kept in the transcript
+    entries: list[TranscriptEntry]
+
+
 # --- Problem state update ---
 
 
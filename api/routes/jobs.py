@@ -9,12 +9,37 @@ import subprocess
 from fastapi import APIRouter, HTTPException
 
 from api.config import get_settings
-from api.jobs import read_job, _job_path
-from api.models.problem import JobStatusResponse
+from api.execution.run_interactive import load_transcript
+from api.jobs import read_job, solution_path_from_key, transcript_path, _job_path
+from api.models.problem import JobStatusResponse, TranscriptResponse
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
 
+# Registered before get_job, whose {job_id:path} would otherwise match it
+@router.get(
+    "/{job_id:path}/transcripts/{solution_key}/{test_set}/{test_case}",
+    response_model=TranscriptResponse,
+)
+def get_transcript(job_id: str, solution_key: str, test_set: str, test_case: str):
+    """
+    Return the interaction transcript recorded for one interactive test case
+    of a run_solution job started with record_transcripts.
+
+    solution_key is the solution path with "/" replaced by "__", e.g.
+    "complete_ac__sol.py".
+    """
+    path = transcript_path(
+        job_id, solution_path_from_key(solution_key), test_set, test_case
+    )
+    if not path.exists():
+        raise HTTPException(
+            status_code=404,
+            detail=f"No transcript for {solution_key} {test_set}/{test_case} in job '{job_id}'",
+        )
+    return load_transcript(path)
+
+
 @router.get("/{job_id:path}", response_model=JobStatusResponse)
 def get_job(job_id: str):
     """
@@ -11,8 +11,14 @@ import subprocess
 
 from fastapi import APIRouter, BackgroundTasks, HTTPException
 
+from api.collection.problems import get_problem
+from api.collection.solutions import get_solutions
 from api.config import get_settings
+from api.execution.calibrate import calibrate_time_limit_job
+from api.execution.profiles import ResourceProfile, build_profile_report
 from api.execution.run_testcase import run_solutions_job
+from api.execution.shrink import shrink_test_job
+from api.execution.stress import stress_test_job
 from api.jobs import (
     JobType,
     create_job,
@@ -20,15 +26,20 @@ from api.jobs import (
     get_latest_job_id,
     get_latest_individual_job_id,
     list_individual_solution_keys,
+    profile_path,
     solution_path_from_key,
     read_job,
 )
 from api.models.problem import (
+    CalibrateTimeLimitRequest,
     JobResponse,
     OpenSolutionRequest,
+    ProfileReport,
     RunSolutionRequest,
     RunSolutionResponse,
     RunSolutionsResponse,
+    ShrinkTestRequest,
+    StressTestRequest,
 )
 
 router = APIRouter(prefix="/problems/{slug}/solutions", tags=["solutions"])
@@ -61,6 +72,61 @@ def run_solution(slug: str, req: RunSolutionRequest, bg: BackgroundTasks):
     return JobResponse(job_ids=[job_id])
 
 
+@router.post("/calibrate-time-limit", response_model=JobResponse)
+def calibrate_time_limit(
+    slug: str, req: CalibrateTimeLimitRequest, bg: BackgroundTasks
+):
+    """
+    Enqueue a time-limit calibration: AC-expected solutions are run
+    req.repeats times on every test and TLE-expected solutions until they
+    time out, and a limit giving the AC solutions req.safety_factor of
+    headroom is suggested (and written to config.yaml if req.apply).
+    """
+    settings = get_settings()
+    problem_path = settings.problems_root / slug
+    if not problem_path.exists():
+        raise HTTPException(status_code=404, detail=f"Problem '{slug}' not found")
+
+    job_id = create_job(slug, JobType.CALIBRATE_TIME_LIMIT)
+    bg.add_task(calibrate_time_limit_job, problem_path, slug, req, job_id)
+    return JobResponse(job_ids=[job_id])
+
+
+@router.post("/stress", response_model=JobResponse)
+def stress_test(slug: str, req: StressTestRequest, bg: BackgroundTasks):
+    """
+    Enqueue a stress test: req.solution_path and the candidate solution are
+    run on inputs from stress/{req.generator} with increasing seeds until
+    their outputs disagree, and the first such input is saved to
+    req.target_set.
+    """
+    settings = get_settings()
+    problem_path = settings.problems_root / slug
+    if not problem_path.exists():
+        raise HTTPException(status_code=404, detail=f"Problem '{slug}' not found")
+
+    job_id = create_job(slug, JobType.STRESS_TEST)
+    bg.add_task(stress_test_job, problem_path, slug, req, job_id)
+    return JobResponse(job_ids=[job_id])
+
+
+@router.post("/shrink", response_model=JobResponse)
+def shrink_test(slug: str, req: ShrinkTestRequest, bg: BackgroundTasks):
+    """
+    Enqueue shrinking of a failing test case: the input is reduced while it
+    passes the input validators and req.solution_path still disagrees with
+    the candidate solution, and the smallest version is saved as a new test.
+    """
+    settings = get_settings()
+    problem_path = settings.problems_root / slug
+    if not problem_path.exists():
+        raise HTTPException(status_code=404, detail=f"Problem '{slug}' not found")
+
+    job_id = create_job(slug, JobType.SHRINK_TEST)
+    bg.add_task(shrink_test_job, problem_path, slug, req, job_id)
+    return JobResponse(job_ids=[job_id])
+
+
 @router.get("/merged-results", response_model=RunSolutionsResponse)
 def get_merged_results(slug: str):
     """
@@ -109,6 +175,43 @@ def get_merged_results(slug: str):
     )
 
 
+@router.get("/profile-report", response_model=ProfileReport)
+def get_profile_report(slug: str, job_id: str | None = None, slowest: int = 10):
+    """
+    Summarise the per-test resource profile of a solution run: timing
+    percentiles per solution and test set, the *slowest* cases, and each
+    AC-expected solution's margin against limits.time.
+
+    Defaults to the latest group run; pass job_id for any other run.
+    """
+    settings = get_settings()
+    problem_path = settings.problems_root / slug
+    if not problem_path.exists():
+        raise HTTPException(status_code=404, detail=f"Problem '{slug}' not found")
+
+    if job_id is None:
+        job_id = get_latest_job_id(slug, JobType.RUN_SOLUTION)
+    if job_id is None or not job_id.startswith(f"{slug}/"):
+        raise HTTPException(status_code=404, detail="No solution run found")
+    path = profile_path(job_id)
+    if not path.exists():
+        raise HTTPException(
+            status_code=404, detail=f"No resource profile for job '{job_id}'"
+        )
+
+    problem = get_problem(settings.problems_root, slug)
+    ac_solutions = {
+        s.path for s in get_solutions(problem_path) if s.expectation_overall() == "AC"
+    }
+    return build_profile_report(
+        ResourceProfile.load(path),
+        job_id,
+        problem.config.limits.time,
+        ac_solutions,
+        slowest=slowest,
+    )
+
+
 @router.post("/open")
 def open_solution_in_editor(slug: str, req: OpenSolutionRequest):
     """Open a solution file in Cursor with the problem directory as workspace."""
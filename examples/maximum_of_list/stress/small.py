@@ -0,0 +1,18 @@
+import random
+
+from testlibpy.shrink import drop_chunks, reduce_numbers
+
+
+def generate(seed: int) -> str:
+    rng = random.Random(seed)
+    n = rng.randint(2, 5)
+    a = rng.sample(range(1, 20), n)
+    return f"{n}\n{' '.join(map(str, a))}\n"
+
+
+def shrink(text: str):
+    n, *a = text.split()
+    for smaller in drop_chunks(a, min_len=2):
+        yield f"{len(smaller)}\n{' '.join(smaller)}\n"
+    for smaller in reduce_numbers(a):
+        yield f"{n}\n{' '.join(smaller)}\n"
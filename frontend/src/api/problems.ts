@@ -1,5 +1,5 @@
 import axios from 'axios'
-import type { Problem, JobStatus, CheckResult, TestSetDetail, SolutionsRunResult } from '../types/problem'
+import type { Problem, JobStatus, CheckResult, TestSetDetail, SolutionsRunResult, Transcript } from '../types/problem'
 
 const client = axios.create({ baseURL: '/api' })
 
@@ -159,6 +159,7 @@ export async function runValidators(
 export interface RunSolutionRequest {
   solution_paths: string[]
   test_set?: string | null
+  record_transcripts?: boolean
 }
 
 export async function runSolutions(
@@ -185,6 +186,19 @@ export async function getJob(jobId: string): Promise<JobStatus> {
   return data
 }
 
+export async function getTranscript(
+  jobId: string,
+  solutionPath: string,
+  testSet: string,
+  testCase: string,
+): Promise<Transcript> {
+  const solutionKey = solutionPath.replaceAll('/', '__')
+  const { data } = await client.get<Transcript>(
+    `/jobs/${jobId}/transcripts/${solutionKey}/${testSet}/${testCase}`,
+  )
+  return data
+}
+
 export async function getMergedResults(slug: string): Promise<SolutionsRunResult> {
   const { data } = await client.get<SolutionsRunResult>(`/problems/${slug}/solutions/merged-results`)
   return data
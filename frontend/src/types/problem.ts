@@ -62,6 +62,8 @@ export interface TestCase {
   name: string
   set_name: string
   description?: string
+  generated_by?: string
+  seed?: number
 }
 
 export interface TestSetConfig {
@@ -92,12 +94,38 @@ export interface JobStatus {
   error?: string
 }
 
+export interface InteractionStats {
+  wall_ms: number
+  exchanges: number
+  mean_latency_ms: number
+  max_latency_ms: number
+}
+
 export interface Verdict {
   test_case: string
   test_set: string
   verdict: string
   time_ms?: number
+  cpu_ms?: number
+  max_rss_kb?: number
+  output_bytes?: number
   comment: string
+  interaction?: InteractionStats
+  transcript?: boolean
+  borderline?: boolean
+  attempts?: number
+}
+
+export interface TranscriptEntry {
+  sender: 'judge' | 'solution'
+  t_ms: number
+  line: string
+}
+
+export interface Transcript {
+  total_lines: number
+  dropped: number
+  entries: TranscriptEntry[]
 }
 
 export interface SolutionRunResult {
@@ -107,9 +135,17 @@ export interface SolutionRunResult {
   set_consistent: Record<string, string>
 }
 
+export interface CompileResult {
+  source: string
+  success: boolean
+  time_ms: number
+  error: string
+}
+
 export interface SolutionsRunResult {
   solutions: SolutionRunResult[]
   status?: string
+  compile?: CompileResult[]
 }
 
 export interface ValidatorResult {
@@ -1,3 +1,37 @@
-from .case_generation import test_case
-from .graph import *
-from .random import *
+"""
+Helpers for writing test generators and validators.
+
+The names of case_generation, graph and random are loaded the first time one
+of them is used, so that importing a light submodule such as
+testlibpy.validate does not also import numpy, yaml and multiprocessing.
+"""
+
+
+def _load() -> None:
+    """Import the package's names, as `from .graph import *` etc. would."""
+    if "test_case" in globals():
+        return
+    from importlib import import_module
+
+    from .case_generation import CaseSpec, generate_cases, test_case
+
+    names = dict(CaseSpec=CaseSpec, generate_cases=generate_cases, test_case=test_case)
+    for module in ("graph", "random"):
+        public = vars(import_module(f".{module}", __name__)).items()
+        names.update((key, value) for key, value in public if key[0] != "_")
+    globals().update(names)
+
+
+def __getattr__(name: str):
+    _load()
+    if name == "__all__":
+        return [key for key in globals() if key[0] != "_"]
+    try:
+        return globals()[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+
+def __dir__() -> list[str]:
+    _load()
+    return sorted(globals())
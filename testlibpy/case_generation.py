@@ -1,12 +1,48 @@
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import contextmanager
+from dataclasses import dataclass, field
+import ctypes
+import filecmp
+import hashlib
 import os
 import inspect
+import multiprocessing
+import random
+import signal
 from collections import defaultdict
+from itertools import chain, islice
 from pathlib import Path
+from typing import Callable, Iterable
 
 import yaml
 
+from .graph import Graph
+from .random import _np
+from .streams import open_sink
+
 rpt_map = defaultdict(lambda: 0)
+_global_seed: int | None = None
+
+_CHUNK_ROWS = 1 << 16  # rows formatted per write by the bulk writers
+
+
+def set_seed(seed: int | None) -> None:
+    """
+    Set the global seed mixed into every case's seed, e.g. to get a fresh
+    but reproducible variant of a test set. Defaults to the TESTLIBPY_SEED
+    environment variable if set, else none.
+    """
+    global _global_seed
+    _global_seed = seed
+
+
+def case_seed(generator: str, case: str, seed: int | None = None) -> int:
+    """
+    The seed test_case uses for *case* (its file stem) produced by
+    *generator* (its path under data/), mixed with the global *seed*.
+    """
+    key = f"{generator}\0{case}" if seed is None else f"{generator}\0{case}\0{seed}"
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], "big")
 
 
 @contextmanager
@@ -14,8 +50,21 @@ def test_case(
     rpt_name=None,
     case_name=None,
     relative_dir="../",
+    seed: int | None = None,
     **config,
 ):
+    """
+    Write one test case: yields a writer for the .in file (and .out as
+    writer.output), then writes the .yaml sidecar with *config*.
+
+    Inside the block ``random`` (and numpy's global generator, and so
+    numpy_rng()) is seeded with a seed derived from the generator's path, the
+    case name and the global seed (see set_seed), or with *seed* if given; it
+    is available as writer.seed and recorded in the sidecar. Regenerating a
+    case therefore reproduces it, and if its input comes out unchanged the
+    existing files, including an .out computed from them, are left alone.
+    The state of ``random`` outside the block is not affected.
+    """
     # First, get __file__ of the code that calls this function
     frame = inspect.currentframe()
     try:
@@ -27,23 +76,155 @@ def test_case(
     finally:
         del frame
 
+    fname = _case_file_name(rpt_name, case_name)
+    with _write_case(caller_file, fname, relative_dir, seed, config) as writer:
+        yield writer
+
+
+def _case_file_name(rpt_name, case_name) -> str:
+    if case_name is None and rpt_name is None:
+        raise ValueError("Need case name or repeat name")
+    if case_name:
+        return f"{case_name}.in"
+    rpt_map[rpt_name] += 1
+    return f"{rpt_name}{rpt_map[rpt_name]}.in"
+
+
+@contextmanager
+def _write_case(
+    caller_file: Path, fname: str, relative_dir: str, seed: int | None, config: dict
+):
     class WriterObj:
         def __init__(self, path: str, extra: str | None = None):
             self.path = path
+            # Written beside the real file, which is only replaced if the
+            # contents differ
+            self.tmp_path = path.with_name(f".{path.name}.tmp")
             self.writer = None
             self.output = None
+            self.seed = None
             if extra:
                 self.output = WriterObj(extra)
 
-        def write_lines(self, lines: list[str]):
+        def _open(self):
             if self.writer is None:
-                self.writer = open(self.path, "w")
-            self.writer.write("\n".join(map(str, lines)) + "\n")
+                self.writer = open_sink(self.tmp_path, compress=False)
+            return self.writer
+
+        def write_lines(self, lines: Iterable):
+            """
+            Write each of *lines* on its own line. *lines* may be any iterable,
+            e.g. a generator, and is written a chunk at a time, so it never
+            has to be held in memory whole.
+            """
+            writer = self._open()
+            lines = iter(lines)
+            chunk = list(islice(lines, _CHUNK_ROWS))
+            while True:
+                writer.write("\n".join(map(str, chunk)))
+                writer.write("\n")
+                if not (chunk := list(islice(lines, _CHUNK_ROWS))):
+                    break
 
         def write_line(self, line: str):
-            if self.writer is None:
-                self.writer = open(self.path, "w")
-            self.writer.write(str(line) + "\n")
+            self._open().write(str(line) + "\n")
+
+        def write_matrix(self, rows, sep: str = " ", columns: int | None = None):
+            """
+            Write each row on its own line, values separated by *sep*: the same
+            output as write_line(sep.join(map(str, row))) for every row, but
+            formatted a chunk of rows at a time with a single %-format, which
+            saves the per-row join. *rows* may be any iterable of rows, or a
+            2-D numpy array. If *columns* is given, only the first *columns*
+            values of each row are written.
+            """
+            writer = self._open()
+            if _np is not None and isinstance(rows, _np.ndarray):
+                rows = rows[:, :columns]
+                row_format = sep.join(["%s"] * rows.shape[1]) + "\n"
+                for start in range(0, len(rows), _CHUNK_ROWS):
+                    chunk = rows[start : start + _CHUNK_ROWS]
+                    writer.write(
+                        row_format * len(chunk) % tuple(chunk.ravel().tolist())
+                    )
+                return
+            rows = iter(rows)
+            while chunk := list(islice(rows, _CHUNK_ROWS)):
+                widths = set(map(len, chunk))
+                if len(widths) == 1:
+                    width = widths.pop()
+                    shown = width if columns is None else min(columns, width)
+                    # %.0s formats the values past *columns* as nothing
+                    row_format = sep.join(["%s"] * shown) + "%.0s" * (width - shown)
+                    writer.write(
+                        (row_format + "\n")
+                        * len(chunk)
+                        % tuple(chain.from_iterable(chunk))
+                    )
+                else:
+                    writer.write(
+                        "\n".join([sep.join(map(str, row[:columns])) for row in chunk])
+                    )
+                    writer.write("\n")
+
+        def write_edges(self, edges, include_weight: bool = True):
+            """
+            Write one "a b" or "a b c" line per edge, e.g. from Graph.edges().
+            With include_weight=False only the first two values are written.
+
+            A Graph is written in insertion order; compact graphs are written
+            straight from their edge arrays, without a tuple per edge.
+            """
+            if isinstance(edges, Graph) and edges.compact:
+                self.write_columns(edges.edge_columns(include_weight))
+                return
+            if isinstance(edges, Graph):
+                edges = edges.edge_list
+            self.write_matrix(edges, columns=None if include_weight else 2)
+
+        def write_columns(self, columns: list, sep: str = " "):
+            """
+            Write row i as the i-th value of every column, e.g. parallel lists
+            or arrays of sources, destinations and weights.
+            """
+            writer = self._open()
+            width = len(columns)
+            row_format = sep.join(["%s"] * width) + "\n"
+            for start in range(0, len(columns[0]), _CHUNK_ROWS):
+                values = [column[start : start + _CHUNK_ROWS] for column in columns]
+                rows = len(values[0])
+                # Interleave the columns with slice assignment, in C
+                flat = [None] * (rows * width)
+                for i, column in enumerate(values):
+                    flat[i::width] = (
+                        column.tolist()
+                        if _np is not None and isinstance(column, _np.ndarray)
+                        else column
+                    )
+                writer.write(row_format * rows % tuple(flat))
+
+        def write_array(self, values, sep: str = " "):
+            """
+            Write a 1-D sequence, iterable or numpy array on one line, or a
+            2-D numpy array one row per line. Iterables are written a chunk
+            at a time.
+            """
+            if _np is not None and isinstance(values, _np.ndarray) and values.ndim > 1:
+                self.write_matrix(values, sep)
+                return
+            if _np is not None and isinstance(values, _np.ndarray):
+                values = values.tolist()
+            if isinstance(values, (list, tuple)):
+                self.write_matrix([values], sep)
+                return
+            writer = self._open()
+            values = iter(values)
+            chunk_sep = ""
+            while chunk := list(islice(values, _CHUNK_ROWS)):
+                writer.write(chunk_sep)
+                writer.write(sep.join(map(str, chunk)))
+                chunk_sep = sep
+            writer.write("\n")
 
         def close(self):
             if self.writer:
@@ -51,27 +232,172 @@ def test_case(
             if self.output:
                 self.output.close()
 
-    directory = (caller_file / relative_dir).resolve()
-    if case_name is None and rpt_name is None:
-        raise ValueError("Need case name or repeat name")
-    if case_name:
-        fname = f"{case_name}.in"
-    elif rpt_name:
-        rpt_map[rpt_name] += 1
-        fname = f"{rpt_name}{rpt_map[rpt_name]}.in"
-    writer = WriterObj(directory / fname, (directory / fname).with_suffix(".out"))
-    yield writer
+        def commit(self) -> bool:
+            """Move what was written into place, unless the file already
+            has those contents. Returns whether the file changed."""
+            if self.writer is None:
+                return False
+            if self.path.exists() and filecmp.cmp(
+                self.tmp_path, self.path, shallow=False
+            ):
+                self.tmp_path.unlink()
+                return False
+            os.replace(self.tmp_path, self.path)
+            return True
 
-    writer.close()
+        def discard(self):
+            for writer in (self, self.output):
+                if writer is not None:
+                    writer.tmp_path.unlink(missing_ok=True)
+
+    directory = (caller_file / relative_dir).resolve()
 
-    # Configuration write
     def get_data_dir(p: Path):
         if p.name == "data":
             return p
         return get_data_dir(p.parent)
 
-    cfg = {"generated_by": str(caller_file.relative_to(get_data_dir(caller_file)))}
+    generated_by = str(caller_file.relative_to(get_data_dir(caller_file)))
+    if seed is None:
+        if _global_seed is not None:
+            global_seed = _global_seed
+        elif os.environ.get("TESTLIBPY_SEED"):
+            global_seed = int(os.environ["TESTLIBPY_SEED"])
+        else:
+            global_seed = None
+        seed = case_seed(generated_by, Path(fname).stem, global_seed)
+
+    writer = WriterObj(directory / fname, (directory / fname).with_suffix(".out"))
+    writer.seed = seed
+    random_state = random.getstate()
+    random.seed(seed)
+    if _np is not None:
+        np_state = _np.random.get_state()
+        _np.random.seed(seed % 2**32)
+    try:
+        yield writer
+        writer.close()
+    except BaseException:
+        writer.close()
+        writer.discard()
+        raise
+    finally:
+        random.setstate(random_state)
+        if _np is not None:
+            _np.random.set_state(np_state)
+
+    if writer.commit() and writer.output.writer is None:
+        # A new input makes an .out computed from the old one stale
+        writer.output.path.unlink(missing_ok=True)
+    writer.output.commit()
+
+    # Configuration write
+    cfg = {"generated_by": generated_by, "seed": seed}
     cfg.update(config)
 
     with open((directory / fname).with_suffix(".yaml"), "w") as f:
         f.write(yaml.safe_dump(cfg))
+
+    manifest = os.environ.get("TESTLIBPY_MANIFEST")
+    if manifest:
+        with open(manifest, "a") as f:
+            f.write(f"{directory / fname}\n")
+
+
+@dataclass
+class CaseSpec:
+    """
+    One case for generate_cases: *build* is called as
+    ``build(writer, **params)`` inside test_case(rpt_name=..., case_name=...,
+    relative_dir=..., seed=..., **config).
+    """
+
+    build: Callable[..., None]
+    params: dict = field(default_factory=dict)
+    rpt_name: str | None = None
+    case_name: str | None = None
+    config: dict = field(default_factory=dict)  # written to the sidecar
+    seed: int | None = None
+    relative_dir: str = "../"
+
+
+_batch: tuple[Path, list[CaseSpec], list[str]] | None = None
+
+
+def _build_case(index: int) -> None:
+    caller_file, specs, fnames = _batch
+    spec = specs[index]
+    with _write_case(
+        caller_file, fnames[index], spec.relative_dir, spec.seed, spec.config
+    ) as writer:
+        spec.build(writer, **spec.params)
+
+
+_PR_SET_PDEATHSIG = 1
+
+
+def _die_with_parent(parent: int) -> None:
+    """
+    Pool initializer: have the kernel kill this worker when the generator
+    dies, e.g. when its run is killed on a timeout, so orphaned workers do
+    not go on writing cases. Linux only; elsewhere it does nothing.
+    """
+    try:
+        prctl = ctypes.CDLL(None, use_errno=True).prctl
+    except (OSError, AttributeError):
+        return
+    prctl(_PR_SET_PDEATHSIG, signal.SIGKILL)
+    if os.getppid() != parent:
+        os._exit(1)  # the generator died before prctl took effect
+
+
+def _available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def generate_cases(specs: Iterable[CaseSpec], *, workers: int | None = None):
+    """
+    Write every case in *specs*, *workers* at a time (default: one per CPU
+    this process may run on)
+    in forked processes. Names are given out in the order of *specs*, as if
+    each were written with test_case in turn, and every case is seeded from
+    its name, so the files are the same as a serial run's. Raises the first
+    failure in that order once the cases already started have finished.
+
+    Builders and params are not pickled, since the workers are forked after
+    *specs* is known; lambdas and closures work. Without fork (or with one
+    worker) the cases are written one after the other.
+    """
+    global _batch
+    frame = inspect.currentframe()
+    try:
+        caller_file = Path(os.path.abspath(frame.f_back.f_code.co_filename))
+    finally:
+        del frame
+
+    specs = list(specs)
+    fnames = [_case_file_name(spec.rpt_name, spec.case_name) for spec in specs]
+    workers = min(workers or _available_cpus(), len(specs))
+    _batch = (caller_file, specs, fnames)
+    try:
+        if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+            for i in range(len(specs)):
+                _build_case(i)
+            return
+        context = multiprocessing.get_context("fork")
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=context,
+            initializer=_die_with_parent,
+            initargs=(os.getpid(),),
+        ) as pool:
+            try:
+                for _ in pool.map(_build_case, range(len(specs))):
+                    pass
+            except BaseException:
+                pool.shutdown(cancel_futures=True)
+                raise
+    finally:
+        _batch = None
@@ -0,0 +1,326 @@
+"""
+Helpers for output checkers.
+
+A checker's judge() gets the input, the solution's output and the expected
+output as strings. Instead of splitting whole outputs into lists, these
+helpers walk the strings in 1 MB pieces, so the extra memory does not grow
+with the output, and do the per-token work in C (zip, map, set and Counter)
+where they can:
+
+    from testlibpy.check import Tokens, WrongAnswer, compare_tokens
+
+    def judge(input_data, process_data, judge_data, points):
+        diff = compare_tokens(process_data, judge_data, abs_eps=1e-6, rel_eps=1e-6)
+        if diff is not None:
+            return make_result("WA", 0, diff)
+        return make_result("AC", points, "Correct")
+
+Outputs that are checked rather than compared are read through Tokens,
+whose methods raise WrongAnswer when the output does not parse:
+
+    def judge(input_data, process_data, judge_data, points):
+        n = int(input_data.split(maxsplit=1)[0])
+        out = Tokens(process_data)
+        try:
+            p = out.next_ints(n, 1, n, "p")
+            out.expect_end()
+        except WrongAnswer as e:
+            return make_result("WA", 0, str(e))
+        diff = check_permutation(p, n)
+        ...
+"""
+
+import re
+from collections import Counter
+from itertools import chain, islice, repeat
+from math import isfinite
+from operator import le, mul, sub
+from typing import Hashable, Iterable, Iterator, Sequence
+
+from .streams import _split_tokens
+
+_CHUNK_SIZE = 1 << 20  # characters split at a time
+_BATCH = 1 << 16  # tokens compared at a time
+_SNIPPET_LEN = 20
+# int() and float() also take "1_0", "+5", non-ASCII digits, "nan" and "inf"
+_INT = re.compile(r"-?[0-9]+")
+_FLOAT = re.compile(r"-?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][+-]?[0-9]+)?")
+# str.translate tables that delete every character a number of that form may
+# contain, to check a whole batch of tokens at once
+_INT_CHARS = str.maketrans("", "", "0123456789-")
+_FLOAT_CHARS = str.maketrans("", "", "0123456789-+.eE")
+
+
+class WrongAnswer(ValueError):
+    """The output does not have the expected form."""
+
+
+def tokens(text: str, chunk_size: int = _CHUNK_SIZE) -> Iterator[str]:
+    """Whitespace-separated tokens of *text*, split *chunk_size* at a time."""
+    pieces = (text[i : i + chunk_size] for i in range(0, len(text), chunk_size))
+    return chain.from_iterable(_split_tokens(pieces))
+
+
+def _snippet(token: str | None) -> str:
+    if token is None:
+        return "EOF"
+    if len(token) > _SNIPPET_LEN:
+        token = token[:_SNIPPET_LEN] + "..."
+    return repr(token)
+
+
+class Tokens:
+    """
+    Reads the tokens of one output (see tokens()) in order. *name* is used
+    in error messages, e.g. "output ended early: expected p[3]".
+    """
+
+    def __init__(self, text: str, name: str = "output"):
+        self._tokens = tokens(text)
+        self.name = name
+        self.count = 0  # tokens read so far
+
+    def __iter__(self) -> Iterator[str]:
+        return self
+
+    def __next__(self) -> str:
+        token = next(self._tokens)
+        self.count += 1
+        return token
+
+    def next(self, name: str = "token") -> str:
+        """The next token; WrongAnswer if there is none."""
+        token = next(self._tokens, None)
+        if token is None:
+            raise WrongAnswer(f"{self.name} ended early: expected {name}")
+        self.count += 1
+        return token
+
+    def next_int(
+        self, lo: int | None = None, hi: int | None = None, name: str = "integer"
+    ) -> int:
+        """The next token as an integer in [*lo*, *hi*]."""
+        token = self.next(name)
+        if not _INT.fullmatch(token):
+            raise WrongAnswer(f"expected {name}, got {_snippet(token)}")
+        try:
+            value = int(token)
+        except ValueError:
+            raise WrongAnswer(
+                f"{name}={_snippet(token)} has too many digits ({len(token)})"
+            ) from None
+        if (lo is not None and value < lo) or (hi is not None and value > hi):
+            raise WrongAnswer(f"{name}={value} is not in [{lo}, {hi}]")
+        return value
+
+    def next_float(
+        self, lo: float | None = None, hi: float | None = None, name: str = "number"
+    ) -> float:
+        """The next token as a finite float in [*lo*, *hi*]."""
+        token = self.next(name)
+        if not _FLOAT.fullmatch(token):
+            raise WrongAnswer(f"expected {name}, got {_snippet(token)}")
+        value = float(token)
+        if not isfinite(value):
+            raise WrongAnswer(f"{name}={token} is not finite")
+        if (lo is not None and value < lo) or (hi is not None and value > hi):
+            raise WrongAnswer(f"{name}={value} is not in [{lo}, {hi}]")
+        return value
+
+    def next_ints(
+        self,
+        n: int,
+        lo: int | None = None,
+        hi: int | None = None,
+        name: str = "integers",
+    ) -> list[int]:
+        """The next *n* tokens as integers, each in [*lo*, *hi*]."""
+        chunk = list(islice(self._tokens, n))
+        self.count += len(chunk)
+        if len(chunk) < n:
+            raise WrongAnswer(f"{self.name} ended early: expected {name}[{len(chunk)}]")
+        try:
+            values = list(map(int, chunk))
+            if "".join(chunk).translate(_INT_CHARS):
+                raise ValueError
+        except ValueError:
+            i, token = next((i, t) for i, t in enumerate(chunk) if not _is_int(t))
+            raise WrongAnswer(f"expected {name}[{i}], got {_snippet(token)}") from None
+        if values and (
+            (lo is not None and min(values) < lo)
+            or (hi is not None and max(values) > hi)
+        ):
+            i, value = next(
+                (i, v)
+                for i, v in enumerate(values)
+                if (lo is not None and v < lo) or (hi is not None and v > hi)
+            )
+            raise WrongAnswer(f"{name}[{i}]={value} is not in [{lo}, {hi}]")
+        return values
+
+    def expect_end(self) -> None:
+        """WrongAnswer if any token is left."""
+        token = next(self._tokens, None)
+        if token is not None:
+            raise WrongAnswer(
+                f"extra {self.name} at token {self.count + 1}: {_snippet(token)}"
+            )
+
+
+def _is_int(token: str) -> bool:
+    if not _INT.fullmatch(token):
+        return False
+    try:
+        int(token)
+    except ValueError:
+        return False
+    return True
+
+
+def floats_close(
+    got: float, expected: float, abs_eps: float = 0.0, rel_eps: float = 0.0
+) -> bool:
+    """Whether *got* is within *abs_eps* of *expected*, or within *rel_eps*
+    of it relative to its size. NaN and infinities are never close."""
+    if not (isfinite(got) and isfinite(expected)):
+        return False
+    diff = abs(got - expected)
+    return diff <= abs_eps or diff <= rel_eps * abs(expected)
+
+
+def _tokens_close(got: str, expected: str, abs_eps: float, rel_eps: float) -> bool:
+    if not (_FLOAT.fullmatch(got) and _FLOAT.fullmatch(expected)):
+        return False
+    return floats_close(float(got), float(expected), abs_eps, rel_eps)
+
+
+def _batch_close(
+    got: list[str], expected: list[str], abs_eps: float, rel_eps: float
+) -> bool:
+    """Whether every pair of tokens is numerically close, without a Python
+    loop. False means "check each pair": a token may not be a number."""
+    text = "".join(chain(got, expected))
+    # Only digits, signs, points and exponents; a "+" only as an exponent sign
+    exponent_signs = text.count("e+") + text.count("E+")
+    if text.translate(_FLOAT_CHARS) or text.count("+") != exponent_signs:
+        return False
+    try:
+        got_values = list(map(float, got))
+        expected_values = list(map(float, expected))
+    except ValueError:
+        return False
+    diffs = list(map(abs, map(sub, got_values, expected_values)))
+    # max() with a NaN (from overflowing tokens) depends on where it is, but
+    # the sum is then NaN too
+    if isfinite(sum(diffs)) and max(diffs) <= abs_eps:
+        return True
+    if not all(map(isfinite, expected_values)):
+        return False
+    # Pairs close only in absolute terms fail here and are checked one by one
+    bounds = map(mul, repeat(rel_eps), map(abs, expected_values))
+    return all(map(le, diffs, bounds))
+
+
+def compare_tokens(
+    process: str,
+    expected: str,
+    *,
+    abs_eps: float | None = None,
+    rel_eps: float | None = None,
+) -> str | None:
+    """
+    Compare two outputs token by token; return a description of the first
+    difference, or None if they match. With *abs_eps* or *rel_eps*, numeric
+    tokens match if they are close (see floats_close).
+
+    Tokens are compared in batches: a batch that is identical, or whose
+    numbers are all close, is accepted with a few C-level passes, and only a
+    batch with a difference is looked at token by token.
+    """
+    tolerance = abs_eps is not None or rel_eps is not None
+    abs_eps = abs_eps or 0.0
+    rel_eps = rel_eps or 0.0
+    got_tokens, expected_tokens = tokens(process), tokens(expected)
+    count = 0
+    while True:
+        got = list(islice(got_tokens, _BATCH))
+        exp = list(islice(expected_tokens, _BATCH))
+        if got == exp:
+            if not got:
+                return None
+            count += len(got)
+            continue
+        if (
+            tolerance
+            and len(got) == len(exp)
+            and _batch_close(got, exp, abs_eps, rel_eps)
+        ):
+            count += len(got)
+            continue
+        for i, (a, b) in enumerate(zip(got, exp), start=count + 1):
+            if a != b and not (tolerance and _tokens_close(a, b, abs_eps, rel_eps)):
+                return f"Token {i}: expected {_snippet(b)}, got {_snippet(a)}"
+        count += min(len(got), len(exp))
+        if len(got) < len(exp):
+            return (
+                f"Output ended early at token {count + 1} "
+                f"(expected {_snippet(exp[len(got)])})"
+            )
+        if len(got) > len(exp):
+            return f"Extra output at token {count + 1}: {_snippet(got[len(exp)])}"
+
+
+def compare_multisets(
+    got: Iterable[Hashable], expected: Iterable[Hashable]
+) -> str | None:
+    """
+    Whether *got* has the same items as *expected*, each the same number of
+    times, in any order (e.g. tokens(process_data) and tokens(judge_data));
+    a description of a difference, or None.
+    """
+    got_counts, expected_counts = Counter(got), Counter(expected)
+    # Counter's own == loops in Python; the counts have no zeros, so the plain
+    # dict comparison is equivalent
+    if dict.__eq__(got_counts, expected_counts):
+        return None
+    differs = (expected_counts - got_counts) or (got_counts - expected_counts)
+    item = next(iter(differs))
+    return (
+        f"{item!r} appears {got_counts[item]} times, expected {expected_counts[item]}"
+    )
+
+
+def compare_sets(got: Iterable[Hashable], expected: Iterable[Hashable]) -> str | None:
+    """
+    Whether *got* and *expected* have the same distinct items, ignoring
+    order and repeats; a description of a difference, or None.
+    """
+    got_set, expected_set = set(got), set(expected)
+    if got_set == expected_set:
+        return None
+    missing = expected_set - got_set
+    if missing:
+        return f"{next(iter(missing))!r} is missing"
+    return f"{next(iter(got_set - expected_set))!r} is not expected"
+
+
+def check_permutation(values: Sequence[int], n: int, start: int = 1) -> str | None:
+    """
+    Whether *values* is a permutation of start, ..., start + n - 1; a
+    description of what is wrong, or None.
+    """
+    if len(values) != n:
+        return f"expected {n} values, got {len(values)}"
+    if not n:
+        return None
+    stop = start + n
+    if min(values) >= start and max(values) < stop and len(set(values)) == n:
+        return None
+    seen = set()
+    for i, value in enumerate(values):
+        if not start <= value < stop:
+            return f"values[{i}]={value} is not in [{start}, {stop - 1}]"
+        if value in seen:
+            return f"values[{i}]={value} appears twice"
+        seen.add(value)
+    return None
@@ -1,13 +1,25 @@
 import collections
+from array import array
+from bisect import bisect_right
 from heapq import heappop, heappush
 from queue import Queue
 import random
-from typing import Callable
-
-from .random import select_k_distinct
+from typing import Callable, Iterable, Sequence
+
+from .random import (
+    _np,
+    _np_index_to_pair,
+    _np_sample_indices,
+    index_to_pair,
+    pair_count,
+    pair_to_index,
+    sample_indices,
+)
 
 ValueGen = int | Callable[tuple[int, int], int]
 
+_INF = float("inf")
+
 
 class Graph:
     """
@@ -17,44 +29,256 @@ class Graph:
     - Supports value randomisation based on end nodes.
     - Supports Basic distance metrics.
 
+    With ``compact=True`` edges are instead kept as three flat arrays (source,
+    destination, weight), and adjacency is built from them in CSR form the
+    first time a traversal needs it. ``edge_list``, ``forward_adj`` and
+    ``backward_adj`` still work but return fresh copies, so use this mode for
+    large graphs that are built, maybe traversed, and written out.
+
+    Constructors and randomisers that take ``rng`` (a numpy.random.Generator,
+    see testlibpy.random.numpy_rng) draw all their random numbers in one
+    batched call and add edges in bulk instead of one at a time. They produce
+    different graphs from the same seed than the default random-module path.
+
     See subclasses for generating specific types of graphs.
     https://csacademy.com/app/graph_editor/ is a great tool for visualising graphs.
     """
 
-    def __init__(self, n: int, *, one_indexed: bool = True):
+    def __init__(self, n: int, *, one_indexed: bool = True, compact: bool = False):
         self.n = n
-        self.forward_adj = [[] for _ in range(self.n + 1)]
-        self.backward_adj = [[] for _ in range(self.n + 1)]
-        self.edge_list = []
         self.one_indexed = one_indexed
+        self.compact = compact
+        if compact:
+            self._src = array("i")
+            self._dst = array("i")
+            self._weights: array | list = array("q")
+            self._csr = {}  # direction → (offsets, targets, weights), built lazily
+        else:
+            self._forward_adj = [[] for _ in range(self.n + 1)]
+            self._backward_adj = [[] for _ in range(self.n + 1)]
+            self._edge_list = []
 
     def vertices(self):
         return range(self.n) if not self.one_indexed else range(1, self.n + 1)
 
+    @property
+    def edge_list(self) -> list[tuple[int, int, int]]:
+        if self.compact:
+            return list(zip(self._src, self._dst, self._weights))
+        return self._edge_list
+
+    @edge_list.setter
+    def edge_list(self, edges: list[tuple[int, int, int]]):
+        if not self.compact:
+            self._edge_list = edges
+            return
+        self._src = array("i", (a for a, _, _ in edges))
+        self._dst = array("i", (b for _, b, _ in edges))
+        self._weights = array("q")
+        for _, _, c in edges:
+            self._add_weight(c)
+        self._csr.clear()
+
+    @property
+    def forward_adj(self) -> list[list[tuple[int, int]]]:
+        if self.compact:
+            return self._adjacency_lists(forward=True)
+        return self._forward_adj
+
+    @forward_adj.setter
+    def forward_adj(self, adj: list[list[tuple[int, int]]]):
+        if self.compact:
+            raise AttributeError("A compact graph's adjacency follows its edges")
+        self._forward_adj = adj
+
+    @property
+    def backward_adj(self) -> list[list[tuple[int, int]]]:
+        if self.compact:
+            return self._adjacency_lists(forward=False)
+        return self._backward_adj
+
+    @backward_adj.setter
+    def backward_adj(self, adj: list[list[tuple[int, int]]]):
+        if self.compact:
+            raise AttributeError("A compact graph's adjacency follows its edges")
+        self._backward_adj = adj
+
+    def _add_weight(self, c) -> None:
+        if isinstance(self._weights, array):
+            try:
+                self._weights.append(c)
+                return
+            except (TypeError, OverflowError):
+                # Not a machine integer; fall back to a list
+                self._weights = list(self._weights)
+        self._weights.append(c)
+
+    def _adjacency(self, forward: bool = True) -> tuple[array, array, array | list]:
+        """CSR adjacency of a compact graph: the neighbours of node v are
+        targets[offsets[v]:offsets[v + 1]], with matching weights."""
+        if forward not in self._csr:
+            heads, tails = (self._src, self._dst) if forward else (self._dst, self._src)
+            offsets = array("q", bytes(8 * (self.n + 2)))
+            for h in heads:
+                offsets[h + 1] += 1
+            for v in range(self.n + 1):
+                offsets[v + 1] += offsets[v]
+            position = offsets[:-1]
+            targets = array("i", bytes(4 * len(heads)))
+            weights = (
+                array(
+                    self._weights.typecode, bytes(self._weights.itemsize * len(heads))
+                )
+                if isinstance(self._weights, array)
+                else [None] * len(heads)
+            )
+            for h, t, c in zip(heads, tails, self._weights):
+                p = position[h]
+                targets[p] = t
+                weights[p] = c
+                position[h] = p + 1
+            self._csr[forward] = (offsets, targets, weights)
+        return self._csr[forward]
+
+    def _adjacency_lists(self, forward: bool) -> list[list[tuple[int, int]]]:
+        offsets, targets, weights = self._adjacency(forward)
+        return [
+            list(
+                zip(
+                    targets[offsets[v] : offsets[v + 1]],
+                    weights[offsets[v] : offsets[v + 1]],
+                )
+            )
+            for v in range(self.n + 1)
+        ]
+
+    def _neighbours(self, node: int, forward: bool = True):
+        """(adjacent node, weight) pairs leaving *node* (entering it if not *forward*)."""
+        if not self.compact:
+            return self._forward_adj[node] if forward else self._backward_adj[node]
+        offsets, targets, weights = self._adjacency(forward)
+        start, end = offsets[node], offsets[node + 1]
+        return zip(targets[start:end], weights[start:end])
+
     def add_edge(self, a: int, b: int, c: ValueGen = 1) -> "Graph":
         if isinstance(c, Callable):
             # Compute weight of edge
             c = c(a, b)
-        self.forward_adj[a].append((b, c))
-        self.backward_adj[b].append((a, c))
-        self.edge_list.append((a, b, c))
+        if self.compact:
+            self._src.append(a)
+            self._dst.append(b)
+            self._add_weight(c)
+            self._csr.clear()
+            return self
+        self._forward_adj[a].append((b, c))
+        self._backward_adj[b].append((a, c))
+        self._edge_list.append((a, b, c))
+        return self
+
+    def add_edges(self, src, dst, c: ValueGen | list = 1) -> "Graph":
+        """
+        Add an edge src[i] -> dst[i] for every i. *src* and *dst* may be
+        sequences or numpy arrays, and *c* may also be a sequence of weights.
+        """
+        if (
+            self.compact
+            and _np is not None
+            and isinstance(src, _np.ndarray)
+            and isinstance(dst, _np.ndarray)
+            and isinstance(c, int)
+            and isinstance(self._weights, array)
+            and -(2**63) <= c < 2**63
+        ):
+            # Copy the buffers straight in
+            self._src.frombytes(src.astype(_np.intc).tobytes())
+            self._dst.frombytes(dst.astype(_np.intc).tobytes())
+            self._weights.frombytes(_np.full(len(src), c, dtype=_np.int64).tobytes())
+            self._csr.clear()
+            return self
+        if _np is not None:
+            src = src.tolist() if isinstance(src, _np.ndarray) else src
+            dst = dst.tolist() if isinstance(dst, _np.ndarray) else dst
+            c = c.tolist() if isinstance(c, _np.ndarray) else c
+        if isinstance(c, Callable):
+            weights = [c(a, b) for a, b in zip(src, dst)]
+        elif isinstance(c, (int, float)):
+            weights = [c] * len(src)
+        else:
+            weights = list(c)
+        if not self.compact:
+            for a, b, w in zip(src, dst, weights):
+                self.add_edge(a, b, w)
+            return self
+        self._src.extend(src)
+        self._dst.extend(dst)
+        if isinstance(self._weights, array):
+            try:
+                weights = array(self._weights.typecode, weights)
+            except (TypeError, OverflowError):
+                # Not all machine integers; fall back to a list
+                self._weights = list(self._weights)
+        self._weights.extend(weights)
+        self._csr.clear()
         return self
 
     def reverse_all_edges(self) -> "Graph":
+        if self.compact:
+            self._src, self._dst = self._dst, self._src
+            self._csr.clear()
+            return self
         self.forward_adj, self.backward_adj = self.backward_adj, self.forward_adj
         self.edge_list = [(b, a, c) for a, b, c in self.edge_list]
         return self
 
-    def randomise_edge_dir(self) -> "Graph":
+    def randomise_edge_dir(self, rng=None) -> "Graph":
+        if rng is not None:
+            flips = (
+                rng.random(len(self._src) if self.compact else len(self._edge_list))
+                > 0.5
+            )
+            if self.compact:
+                src = _np.array(self._src, dtype=_np.intc)
+                dst = _np.array(self._dst, dtype=_np.intc)
+                self._src = array("i", _np.where(flips, dst, src).tobytes())
+                self._dst = array("i", _np.where(flips, src, dst).tobytes())
+                self._csr.clear()
+                return self
+            self.edge_list = [
+                (b, a, c) if flip else (a, b, c)
+                for (a, b, c), flip in zip(self.edge_list, flips.tolist())
+            ]
+            self._rebuild_adjacency()
+            return self
+        if self.compact:
+            src, dst = self._src, self._dst
+            for i in range(len(src)):
+                if random.random() > 0.5:
+                    src[i], dst[i] = dst[i], src[i]
+            self._csr.clear()
+            return self
         self.edge_list = [
             (b, a, c) if random.random() > 0.5 else (a, b, c)
             for a, b, c in self.edge_list
         ]
+        self._rebuild_adjacency()
         return self
 
-    def randomise_nodes(self) -> tuple["Graph", dict[int, int], dict[int, int]]:
-        m = list(range(self.n))
-        random.shuffle(m)
+    def _rebuild_adjacency(self) -> None:
+        """Make the adjacency lists of a non-compact graph match edge_list."""
+        self._forward_adj = [[] for _ in range(self.n + 1)]
+        self._backward_adj = [[] for _ in range(self.n + 1)]
+        for a, b, c in self._edge_list:
+            self._forward_adj[a].append((b, c))
+            self._backward_adj[b].append((a, c))
+
+    def randomise_nodes(
+        self, rng=None
+    ) -> tuple["Graph", dict[int, int], dict[int, int]]:
+        if rng is not None:
+            m = rng.permutation(self.n).tolist()
+        else:
+            m = list(range(self.n))
+            random.shuffle(m)
         if self.one_indexed:
             forward_map = {i + 1: m[i] + 1 for i in range(self.n)}
             backward_map = {m[i] + 1: i + 1 for i in range(self.n)}
@@ -62,11 +286,34 @@ class Graph:
             forward_map = {i: m[i] for i in range(self.n)}
             backward_map = {m[i]: i for i in range(self.n)}
 
-        new_graph = Graph(self.n, one_indexed=self.one_indexed)
+        new_graph = Graph(self.n, one_indexed=self.one_indexed, compact=self.compact)
+        if rng is not None and self.compact:
+            # Index 0 is unused when one-indexed; relabel through an array
+            relabel = _np.arange(self.n + 1)
+            off = int(self.one_indexed)
+            relabel[off : off + self.n] = _np.array(m) + off
+            new_graph.add_edges(
+                relabel[_np.array(self._src, dtype=_np.intc)],
+                relabel[_np.array(self._dst, dtype=_np.intc)],
+                self._weights,
+            )
+            return new_graph, forward_map, backward_map
         for a, b, c in self.edge_list:
             new_graph.add_edge(forward_map[a], forward_map[b], c)
         return new_graph, forward_map, backward_map
 
+    def edge_columns(self, include_weight=True) -> list:
+        """
+        Sources, destinations and (if *include_weight*) weights as separate
+        sequences, in insertion order. Compact graphs return their arrays
+        without building a tuple per edge.
+        """
+        if self.compact:
+            columns = [self._src, self._dst, self._weights]
+        else:
+            columns = [list(column) for column in zip(*self._edge_list)] or [[], [], []]
+        return columns if include_weight else columns[:2]
+
     def edges(self, randomise=True, include_weight=True):
         edge_copy = self.edge_list[::]
         if randomise:
@@ -95,14 +342,14 @@ class Graph:
             dist, node = heappop(heap)
             if dist > distance[node]:
                 continue
-            for adj, w in self.forward_adj[node]:
+            for adj, w in self._neighbours(node):
                 combined = reduce_distance(dist, w)
                 if combined < distance[adj]:
                     distance[adj] = combined
                     heappush(heap, (distance[adj], adj))
                     parent[adj] = node
             if not respect_direction:
-                for adj, w in self.forward_adj[node]:
+                for adj, w in self._neighbours(node, forward=False):
                     combined = reduce_distance(dist, w)
                     if combined < distance[adj]:
                         distance[adj] = combined
@@ -110,6 +357,126 @@ class Graph:
                         parent[adj] = node
         return distance, parent
 
+    def _traversal(self, sources, respect_direction: bool, unreached=-1):
+        """Fresh distance and parent lists with *sources* at distance 0, the
+        sources in order, and the adjacency directions to follow."""
+        dist = [unreached] * (self.n + 1)
+        parent = [-1] * (self.n + 1)
+        start = []
+        for source in [sources] if isinstance(sources, int) else sources:
+            if dist[source] != 0:
+                dist[source] = 0
+                start.append(source)
+        return dist, parent, start, (True,) if respect_direction else (True, False)
+
+    def bfs(
+        self, sources: int | Iterable[int], *, respect_direction: bool = True
+    ) -> tuple[list[int], list[int]]:
+        """
+        Number of edges on a shortest path from the nearest of *sources* (a
+        node or several) to every node, ignoring weights. Returns (distance,
+        parent) lists indexed by node, with -1 for unreachable nodes and for
+        the parents of sources.
+        """
+        dist, parent, queue, directions = self._traversal(sources, respect_direction)
+        neighbours = self._neighbours
+        # The queue is a list that grows while it is walked
+        for node in queue:
+            d = dist[node] + 1
+            for forward in directions:
+                for adj, _ in neighbours(node, forward):
+                    if dist[adj] < 0:
+                        dist[adj] = d
+                        parent[adj] = node
+                        queue.append(adj)
+        return dist, parent
+
+    def bfs_01(
+        self, sources: int | Iterable[int], *, respect_direction: bool = True
+    ) -> tuple[list[int], list[int]]:
+        """
+        Like bfs, but with every edge weighing 0 or 1 (raises ValueError
+        otherwise), using a deque instead of Dijkstra's heap.
+        """
+        dist, parent, start, directions = self._traversal(
+            sources, respect_direction, _INF
+        )
+        neighbours = self._neighbours
+        done = [False] * (self.n + 1)
+        queue = collections.deque(start)
+        while queue:
+            node = queue.popleft()
+            if done[node]:
+                continue
+            done[node] = True
+            d = dist[node]
+            for forward in directions:
+                for adj, w in neighbours(node, forward):
+                    if w == 0:
+                        if d < dist[adj]:
+                            dist[adj] = d
+                            parent[adj] = node
+                            queue.appendleft(adj)
+                    elif w == 1:
+                        if d + 1 < dist[adj]:
+                            dist[adj] = d + 1
+                            parent[adj] = node
+                            queue.append(adj)
+                    else:
+                        raise ValueError(f"bfs_01 needs 0/1 weights, got {w!r}")
+        return [-1 if d == _INF else d for d in dist], parent
+
+    def _search(self) -> Callable:
+        """The cheapest of bfs, bfs_01 and _dijkstra that suits the weights."""
+        weights = self._weights if self.compact else [c for *_, c in self._edge_list]
+        if not weights or min(weights) == max(weights) == 1:
+            return self.bfs
+        if min(weights) < 0:
+            raise ValueError("Shortest distances need non-negative weights")
+        if max(weights) <= 1 and all(w in (0, 1) for w in weights):
+            return self.bfs_01
+        return self._dijkstra
+
+    def _dijkstra(self, sources, *, respect_direction: bool = True):
+        dist, parent, start, directions = self._traversal(
+            sources, respect_direction, _INF
+        )
+        neighbours = self._neighbours
+        heap = [(0, source) for source in start]
+        while heap:
+            d, node = heappop(heap)
+            if d > dist[node]:
+                continue
+            for forward in directions:
+                for adj, w in neighbours(node, forward):
+                    combined = d + w
+                    if combined < dist[adj]:
+                        dist[adj] = combined
+                        parent[adj] = node
+                        heappush(heap, (combined, adj))
+        return [-1 if d == _INF else d for d in dist], parent
+
+    def shortest_distances(
+        self, sources: int | Iterable[int], *, respect_direction: bool = True
+    ) -> tuple[list, list[int]]:
+        """
+        Weighted distance from the nearest of *sources* to every node, as
+        (distance, parent) lists like bfs. Weights must be non-negative; bfs
+        or bfs_01 is used when they are all 1 or all 0/1.
+        """
+        return self._search()(sources, respect_direction=respect_direction)
+
+    def all_pairs_distances(self, *, respect_direction: bool = True) -> list[list]:
+        """
+        Distance matrix of a small graph: row u is shortest_distances(u)[0],
+        indexed like it (the row of unused node 0 is all -1 when one-indexed).
+        """
+        search = self._search()
+        matrix = [[-1] * (self.n + 1) for _ in range(self.n + 1)]
+        for u in self.vertices():
+            matrix[u] = search(u, respect_direction=respect_direction)[0]
+        return matrix
+
 
 ### Trees
 
@@ -119,8 +486,15 @@ class Path(Graph):
     Path from 1 to N (or 0 to N-1)
     """
 
-    def __init__(self, n: int, *, one_indexed: bool = True, c: ValueGen = 1):
-        super().__init__(n, one_indexed=one_indexed)
+    def __init__(
+        self,
+        n: int,
+        *,
+        one_indexed: bool = True,
+        compact: bool = False,
+        c: ValueGen = 1,
+    ):
+        super().__init__(n, one_indexed=one_indexed, compact=compact)
         # Add edges from start to finish
         for i in self.vertices():
             if i + 1 in self.vertices():
@@ -133,9 +507,15 @@ class CompleteTree(Graph):
     """
 
     def __init__(
-        self, n: int, *, one_indexed: bool = True, k: int = 2, c: ValueGen = 1
+        self,
+        n: int,
+        *,
+        one_indexed: bool = True,
+        compact: bool = False,
+        k: int = 2,
+        c: ValueGen = 1,
     ):
-        super().__init__(n, one_indexed=one_indexed)
+        super().__init__(n, one_indexed=one_indexed, compact=compact)
         if one_indexed:
             child_map = lambda x: [k * (x - 1) + i + 1 for i in range(1, k + 1)]
         else:
@@ -151,8 +531,15 @@ class StarTree(Graph):
     Star Tree, where everything is connected to the first node.
     """
 
-    def __init__(self, n: int, *, one_indexed: bool = True, c: ValueGen = 1):
-        super().__init__(n, one_indexed=one_indexed)
+    def __init__(
+        self,
+        n: int,
+        *,
+        one_indexed: bool = True,
+        compact: bool = False,
+        c: ValueGen = 1,
+    ):
+        super().__init__(n, one_indexed=one_indexed, compact=compact)
         for i in self.vertices():
             if i != int(one_indexed):
                 self.add_edge(int(one_indexed), i, c)
@@ -164,10 +551,21 @@ class SkinnyTree(Graph):
     """
 
     def __init__(
-        self, n: int, *, one_indexed: bool = True, bf: int = 3, c: ValueGen = 1
+        self,
+        n: int,
+        *,
+        one_indexed: bool = True,
+        compact: bool = False,
+        bf: int = 3,
+        c: ValueGen = 1,
+        rng=None,
     ):
-        super().__init__(n, one_indexed=one_indexed)
+        super().__init__(n, one_indexed=one_indexed, compact=compact)
         off = int(one_indexed)
+        if rng is not None:
+            nodes = _np.arange(1 + off, n + off)
+            self.add_edges(rng.integers(_np.maximum(off, nodes - bf), nodes), nodes, c)
+            return
         # Every node except the first:
         for i in range(1 + off, n + off):
             # Select a parent from at most bf steps back
@@ -180,9 +578,21 @@ class RandomTree(Graph):
     Purely random tree by randomly adding leaves to an existing tree at any random node.
     """
 
-    def __init__(self, n: int, *, one_indexed: bool = True, c: ValueGen = 1):
-        super().__init__(n, one_indexed=one_indexed)
+    def __init__(
+        self,
+        n: int,
+        *,
+        one_indexed: bool = True,
+        compact: bool = False,
+        c: ValueGen = 1,
+        rng=None,
+    ):
+        super().__init__(n, one_indexed=one_indexed, compact=compact)
         off = int(one_indexed)
+        if rng is not None:
+            nodes = _np.arange(1 + off, n + off)
+            self.add_edges(rng.integers(off, nodes), nodes, c)
+            return
         for i in range(1 + off, n + off):
             j = random.randint(off, i - 1)
             self.add_edge(j, i, c)
@@ -196,8 +606,15 @@ class Complete(Graph):
     Path from a to any b > a
     """
 
-    def __init__(self, n: int, *, one_indexed: bool = True, c: ValueGen = 1):
-        super().__init__(n, one_indexed=one_indexed)
+    def __init__(
+        self,
+        n: int,
+        *,
+        one_indexed: bool = True,
+        compact: bool = False,
+        c: ValueGen = 1,
+    ):
+        super().__init__(n, one_indexed=one_indexed, compact=compact)
         # Add edges from start to finish
         for i in self.vertices():
             for j in self.vertices():
@@ -218,29 +635,71 @@ class RandomGraph(Graph):
         m: int,
         *,
         one_indexed: bool = True,
+        compact: bool = False,
         c: ValueGen = 1,
-        fixed_edges: list[tuple[int, int]] = [],
+        fixed_edges: Sequence[tuple[int, int]] = (),
+        rng=None,
     ):
-        super().__init__(n, one_indexed=one_indexed)
+        super().__init__(n, one_indexed=one_indexed, compact=compact)
         off = int(one_indexed)
+        if rng is not None and m <= n**2 / 20:
+            # Draw candidate pairs in batches and de-duplicate them as integer
+            # keys i * base + j, so no Python code runs per edge.
+            base = n + off
+            fixed = _np.array(fixed_edges, dtype=_np.int64).reshape(-1, 2)
+            fixed.sort(axis=1)
+            keys = fixed[:, 0] * base + fixed[:, 1]
+            tries = 0
+            while len(keys) < m and tries < 10:
+                need = m - len(keys)
+                pairs = rng.integers(off, off + n, size=(need + need // 8 + 16, 2))
+                pairs.sort(axis=1)
+                pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+                new = pairs[:, 0] * base + pairs[:, 1]
+                new = new[~_np.isin(new, keys)]
+                _, first = _np.unique(new, return_index=True)
+                new = new[_np.sort(first)][:need]
+                tries = 0 if len(new) else tries + 1
+                keys = _np.concatenate([keys, new])
+            if len(keys) < m:
+                raise ValueError(f"Failed to generate {m} edges for {n} vertex graph")
+            self.add_edges(keys // base, keys % base, c)
+            self.randomise_edge_dir(rng)
+            return
         fixed_ordered = set((min(a, b), max(a, b)) for a, b in fixed_edges)
         if m > n**2 / 20:
-            # We're already generating a tenth of the total edge set, so just generate the full edge set and randomise.
-            edge_set = [
-                (i, j)
-                for i in self.vertices()
-                for j in self.vertices()
-                if i < j and (i, j) not in fixed_ordered
-            ]
-            edge_actual = select_k_distinct(edge_set, m)
-            for i, j in edge_actual:
-                self.add_edge(i, j, c)
+            # Too dense to draw edges until enough are distinct. Number the
+            # pairs (see testlibpy.random.index_to_pair) and sample indices
+            # among those not fixed, without listing the possible edges.
+            fixed_keys = sorted(
+                pair_to_index(a - off, b - off) for a, b in fixed_ordered
+            )
+            # The x-th free index is x plus the number of fixed keys up to it;
+            # fixed_keys[i] - i counts the free indices below fixed_keys[i].
+            shifts = [key - i for i, key in enumerate(fixed_keys)]
+            free = pair_count(n) - len(fixed_keys)
+            k = m - len(fixed_keys)
+            if k < 0 or k > free:
+                raise ValueError(f"Cannot generate {m} edges for {n} vertex graph")
+            if rng is not None:
+                x = _np_sample_indices(rng, free, k)
+                x += _np.searchsorted(_np.array(shifts, dtype=_np.int64), x, "right")
+                keys = _np.concatenate([_np.array(fixed_keys, dtype=_np.int64), x])
+                i, j = _np_index_to_pair(keys)
+                self.add_edges(i + off, j + off, c)
+                self.randomise_edge_dir(rng)
+                return
+            for x in fixed_keys + [
+                x + bisect_right(shifts, x) for x in sample_indices(free, k)
+            ]:
+                i, j = index_to_pair(x)
+                self.add_edge(i + off, j + off, c)
             self.randomise_edge_dir()
         else:
             # The edges make up a small selection of the possible options, so randomly select
             try_limit = 10
             edge_set = fixed_ordered
-            edge_list = fixed_edges
+            edge_list = list(fixed_edges)
             tries = 0
             while len(edge_list) < m and tries < try_limit:
                 i = random.randint(off, off + n - 1)
@@ -263,20 +722,48 @@ class RandomGraph(Graph):
 
 
 class RandomConnectedGraph(RandomGraph):
-    def __init__(self, n: int, m: int, *, one_indexed: bool = True, c: ValueGen = 1):
+    def __init__(
+        self,
+        n: int,
+        m: int,
+        *,
+        one_indexed: bool = True,
+        compact: bool = False,
+        c: ValueGen = 1,
+        rng=None,
+    ):
         # Generate tree_edges, to be used as the basis for RandomGraph.
         off = int(one_indexed)
-        tree_edges = []
-        for i in range(1 + off, n + off):
-            j = random.randint(off, i - 1)
-            tree_edges.append((j, i))
-
-        super().__init__(n, m, one_indexed=one_indexed, fixed_edges=tree_edges, c=c)
+        if rng is not None:
+            nodes = _np.arange(1 + off, n + off)
+            tree_edges = _np.stack([rng.integers(off, nodes), nodes], axis=1)
+        else:
+            tree_edges = []
+            for i in range(1 + off, n + off):
+                j = random.randint(off, i - 1)
+                tree_edges.append((j, i))
+
+        super().__init__(
+            n,
+            m,
+            one_indexed=one_indexed,
+            compact=compact,
+            fixed_edges=tree_edges,
+            c=c,
+            rng=rng,
+        )
 
 
 class Cycle(Graph):
-    def __init__(self, n: int, *, one_indexed: bool = True, c: ValueGen = 1):
-        super().__init__(n, one_indexed=one_indexed)
+    def __init__(
+        self,
+        n: int,
+        *,
+        one_indexed: bool = True,
+        compact: bool = False,
+        c: ValueGen = 1,
+    ):
+        super().__init__(n, one_indexed=one_indexed, compact=compact)
         off = int(one_indexed)
         for i in self.vertices():
             ni = i + 1
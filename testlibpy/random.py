@@ -1,13 +1,142 @@
+import math
 import random
+import sys
+from itertools import islice
+from typing import Iterable, Sequence
 
+try:
+    import numpy as _np
+except ImportError:  # numpy is optional; only the rng= fast paths need it
+    _np = None
 
-def select_k_distinct(collection: list, k: int):
-    ind = [
-        x + i
-        for i, x in enumerate(
-            sorted([random.randint(0, len(collection) - k - 1) for _ in range(k)])
-        )
-    ]
-    vals = [collection[i] for i in ind]
-    random.shuffle(vals)
-    return vals
+_END = object()
+_BELOW_ONE = 1 - 2**-53  # largest float below 1
+
+
+def numpy_rng(seed: int | None = None):
+    """
+    A numpy.random.Generator for the rng= fast paths in testlibpy.graph.
+
+    Without *seed* it is seeded from the random module, so random.seed() also
+    makes generators that use it reproducible.
+    """
+    if _np is None:
+        raise ImportError("numpy_rng requires numpy")
+    return _np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+
+
+def sample_indices(n: int, k: int) -> list[int]:
+    """
+    k distinct indices from range(n), uniformly at random and in random
+    order, using Floyd's algorithm: O(k) time and memory however large n is.
+    """
+    if not 0 <= k <= n:
+        raise ValueError(f"Cannot select {k} distinct values from {n}")
+    chosen: set[int] = set()
+    for j in range(n - k, n):
+        t = random.randint(0, j)
+        chosen.add(j if t in chosen else t)
+    result = list(chosen)
+    random.shuffle(result)
+    return result
+
+
+def select_k_distinct(collection: Sequence, k: int) -> list:
+    """k distinct elements of *collection*, in random order."""
+    return [collection[i] for i in sample_indices(len(collection), k)]
+
+
+def reservoir_sample(iterable: Iterable, k: int) -> list:
+    """
+    k elements drawn uniformly from *iterable* without knowing its length,
+    in one pass and O(k) memory (Li's Algorithm L, which skips ahead instead
+    of drawing a number per element). Returns fewer if it runs out.
+    """
+    it = iter(iterable)
+    reservoir = list(islice(it, k))
+    if len(reservoir) < k or k == 0:
+        random.shuffle(reservoir)
+        return reservoir
+    w = 1.0
+    while True:
+        # w rounds to 1 for large k; log1p(-1) would be a domain error
+        w = min(w * math.exp(math.log(random.random() or 1e-300) / k), _BELOW_ONE)
+        skip = math.floor(math.log(random.random() or 1e-300) / math.log1p(-w))
+        item = next(islice(it, min(skip, sys.maxsize), None), _END)
+        if item is _END:
+            break
+        reservoir[random.randrange(k)] = item
+    random.shuffle(reservoir)
+    return reservoir
+
+
+def pair_count(n: int) -> int:
+    """Number of unordered pairs i < j of range(n)."""
+    return n * (n - 1) // 2
+
+
+def index_to_pair(index: int) -> tuple[int, int]:
+    """
+    The *index*-th unordered pair (i, j), i < j, in the order (0, 1), (0, 2),
+    (1, 2), (0, 3), ... so that indices below pair_count(n) are exactly the
+    pairs of range(n). Together with sample_indices this picks random edges
+    without listing every possible one.
+    """
+    j = (1 + math.isqrt(1 + 8 * index)) // 2
+    return index - pair_count(j), j
+
+
+def pair_to_index(i: int, j: int) -> int:
+    """Inverse of index_to_pair; the order of i and j does not matter."""
+    i, j = min(i, j), max(i, j)
+    return pair_count(j) + i
+
+
+def _np_sample_indices(rng, n: int, k: int):
+    """sample_indices for the rng= fast paths: a numpy array, in random order."""
+    if not 0 <= k <= n:
+        raise ValueError(f"Cannot select {k} distinct values from {n}")
+    if 2 * k > n:
+        # Cheaper to draw the indices left out; the result is O(n) anyway.
+        keep = _np.ones(n, dtype=bool)
+        keep[_np_sample_indices(rng, n, n - k)] = False
+        result = _np.flatnonzero(keep)
+        rng.shuffle(result)
+        return result
+    # At most half of the indices are taken, so each batch of draws with
+    # replacement keeps a constant fraction of what is still needed. Which
+    # of a batch's new indices are kept is itself random, so the result is
+    # uniform once shuffled.
+    parts = [_np.empty(0, dtype=_np.int64)]
+    taken = 0
+    seen = _np.zeros(n, dtype=bool) if n <= 64 * k else None
+    while taken < k:
+        need = k - taken
+        draws = rng.integers(0, n, size=need + need // 4 + 16)
+        if seen is not None:
+            fresh = _np.zeros(n, dtype=bool)
+            fresh[draws] = True
+            draws = _np.flatnonzero(fresh & ~seen)
+        else:
+            draws.sort()
+            draws = draws[_np.append(True, draws[1:] != draws[:-1])]
+            for part in parts:
+                draws = draws[~_np.isin(draws, part, assume_unique=True)]
+        if len(draws) > need:
+            draws = rng.choice(draws, need, replace=False)
+        if seen is not None:
+            seen[draws] = True
+        parts.append(draws)
+        taken += len(draws)
+    result = _np.concatenate(parts)
+    rng.shuffle(result)
+    return result
+
+
+def _np_index_to_pair(index):
+    """index_to_pair over a numpy array of indices; returns (i, j) arrays."""
+    j = ((1 + _np.sqrt(1 + 8 * index.astype(_np.float64))) // 2).astype(_np.int64)
+    # Correct the float square root by one either way.
+    j -= j * (j - 1) // 2 > index
+    j += (j + 1) * j // 2 <= index
+    return index - j * (j - 1) // 2, j
@@ -0,0 +1,108 @@
+"""
+Building blocks for shrinking failing inputs.
+
+A shrinker is a function ``shrink(text: str) -> Iterable[str]`` yielding
+candidate reductions of an input, most aggressive first. The shrink job keeps
+the first candidate that still fails and calls the shrinker again on it, so a
+shrinker only has to propose one step at a time. Candidates that are not
+smaller than the input (shorter, or as long but earlier in string order) are
+skipped, as are ones the input validators reject.
+
+Problems with structured input (counts, matrices, graphs) define their own
+``shrink`` next to their stress generators, built from the helpers below:
+
+    from testlibpy.shrink import drop_chunks, reduce_numbers
+
+    def shrink(text):
+        n, *a = text.split()
+        for smaller in drop_chunks(a, min_len=2):
+            yield f"{len(smaller)}\\n{' '.join(smaller)}\\n"
+        for smaller in reduce_numbers(a):
+            yield f"{n}\\n{' '.join(smaller)}\\n"
+
+``default_shrink`` is used when a problem has no shrinker. It understands
+the common "count, then that many items" layout; anything more structured
+needs its own ``shrink``.
+"""
+
+from typing import Iterator, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def drop_chunks(items: Sequence[T], *, min_len: int = 0) -> Iterator[list[T]]:
+    """
+    Yield *items* with one contiguous chunk removed, as in delta debugging:
+    first each half, then each quarter, and so on down to single items.
+    Results shorter than *min_len* are not yielded.
+    """
+    n = len(items)
+    chunk = n // 2
+    while chunk >= 1:
+        if n - chunk >= min_len:
+            for start in range(0, n, chunk):
+                yield list(items[:start]) + list(items[start + chunk :])
+        chunk //= 2
+
+
+def reduce_numbers(tokens: Sequence[str]) -> Iterator[list[str]]:
+    """
+    Yield *tokens* with one integer token made smaller in absolute value:
+    replaced by 0, halved, or moved one step towards 0. Other tokens are left
+    alone.
+    """
+    for i, token in enumerate(tokens):
+        try:
+            value = int(token)
+        except ValueError:
+            continue
+        if value == 0:
+            continue
+        sign = 1 if value > 0 else -1
+        seen = {value}
+        for smaller in (0, sign * (abs(value) // 2), value - sign):
+            if smaller not in seen:
+                seen.add(smaller)
+                yield [*tokens[:i], str(smaller), *tokens[i + 1 :]]
+
+
+def drop_counted(lines: Sequence[str]) -> Iterator[str]:
+    """
+    For an input whose first token is a count n followed by n lines, or by a
+    line of n tokens, yield it with chunks of those items dropped (see
+    drop_chunks) and the count lowered to match. The rest of the first line,
+    and any lines after a line of tokens, are kept. Yields nothing for other
+    inputs.
+    """
+    head = lines[0].split() if lines else []
+    try:
+        n = int(head[0])
+    except (IndexError, ValueError):
+        return
+    if len(lines) - 1 == n:
+        for smaller in drop_chunks(lines[1:], min_len=1):
+            count = " ".join([str(len(smaller)), *head[1:]])
+            yield "\n".join([count, *smaller]) + "\n"
+    elif len(lines) >= 2 and len(lines[1].split()) == n:
+        for smaller in drop_chunks(lines[1].split(), min_len=1):
+            count = " ".join([str(len(smaller)), *head[1:]])
+            yield "\n".join([count, " ".join(smaller), *lines[2:]]) + "\n"
+
+
+def default_shrink(text: str) -> Iterator[str]:
+    """
+    Drop counted items (see drop_counted), then chunks of lines, then chunks
+    of tokens within each line, then reduce numbers, keeping the layout of
+    everything else.
+    """
+    lines = text.splitlines()
+    yield from drop_counted(lines)
+    for smaller in drop_chunks(lines):
+        yield "\n".join(smaller) + "\n"
+    for i, line in enumerate(lines):
+        tokens = line.split()
+        for smaller in drop_chunks(tokens, min_len=1):
+            yield "\n".join([*lines[:i], " ".join(smaller), *lines[i + 1 :]]) + "\n"
+    for i, line in enumerate(lines):
+        for smaller in reduce_numbers(line.split()):
+            yield "\n".join([*lines[:i], " ".join(smaller), *lines[i + 1 :]]) + "\n"
@@ -0,0 +1,164 @@
+"""
+Streaming input and output for large test cases.
+
+``open_sink`` is what test_case writers write through: text encoded into a
+binary file with a large buffer, optionally gzip compressed on the fly. It
+can also be used directly, e.g. to archive a huge case as ``big.in.gz``.
+Test cases themselves stay uncompressed, since they are fed to solutions as
+stdin.
+
+The readers go the other way for validators and checkers: they read stdin
+(or a file, gzip or not) in fixed-size chunks and yield lines or tokens, so
+a 500 MB case is validated in constant memory:
+
+    from testlibpy.streams import read_ints
+
+    values = read_ints()
+    n = next(values)
+    for _ in range(n):
+        assert 1 <= next(values) <= 10**9
+    assert next(values, None) is None
+"""
+
+import codecs
+import gzip
+import io
+import sys
+from functools import partial
+from itertools import chain
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, TextIO
+
+_BUFFER_SIZE = 1 << 20
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def open_sink(
+    path: str | Path,
+    *,
+    compress: bool | None = None,
+    compresslevel: int = 6,
+    buffer_size: int = _BUFFER_SIZE,
+    encoding: str = "utf-8",
+) -> TextIO:
+    """
+    Open *path* for writing text through a binary file with a large buffer,
+    gzip compressed on the fly if *compress* is true (by default: if *path*
+    ends in .gz). Level 6 compresses nearly as well as 9 at several times
+    the speed. Newlines are written as "\n" on every platform. The binary
+    file is available as ``.buffer`` for writing bytes.
+    """
+    if compress is None:
+        compress = str(path).endswith(".gz")
+    binary = open(path, "wb", buffering=buffer_size)
+    if compress:
+        try:
+            binary = _GzipSink(binary, compresslevel)
+        except BaseException:
+            binary.close()
+            raise
+    return io.TextIOWrapper(binary, encoding=encoding, newline="")
+
+
+class _GzipSink(gzip.GzipFile):
+    """A GzipFile that also closes the file it writes to."""
+
+    def __init__(self, binary: BinaryIO, compresslevel: int):
+        super().__init__(fileobj=binary, mode="wb", compresslevel=compresslevel)
+        self._binary = binary
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            self._binary.close()
+
+
+def open_source(source: str | Path | BinaryIO | None = None) -> BinaryIO:
+    """
+    A binary stream over *source*: a path, a binary file, or stdin if None.
+    Gzip data is decompressed transparently.
+    """
+    if source is None:
+        stream = sys.stdin.buffer
+    elif isinstance(source, (str, Path)):
+        stream = open(source, "rb", buffering=_BUFFER_SIZE)
+    else:
+        stream = source
+    if not hasattr(stream, "peek"):
+        stream = io.BufferedReader(stream, _BUFFER_SIZE)
+    if stream.peek(2)[:2] == _GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    return stream
+
+
+def _chunks(
+    source: str | Path | BinaryIO | None, chunk_size: int, encoding: str
+) -> Iterator[str]:
+    stream = open_source(source)
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while chunk := stream.read(chunk_size):
+        yield decoder.decode(chunk)
+    yield decoder.decode(b"", final=True)
+
+
+def _line_chunks(
+    source: str | Path | BinaryIO | None, chunk_size: int, encoding: str
+) -> Iterator[list[str]]:
+    rest = ""
+    for text in _chunks(source, chunk_size, encoding):
+        # rest keeps a "\r" at the end of one chunk next to the "\n" of the next
+        lines = (rest + text).replace("\r\n", "\n").split("\n")
+        rest = lines.pop()
+        yield lines
+    if rest:
+        yield [rest.removesuffix("\r")]
+
+
+def read_lines(
+    source: str | Path | BinaryIO | None = None,
+    *,
+    chunk_size: int = _BUFFER_SIZE,
+    encoding: str = "utf-8",
+) -> Iterator[str]:
+    """Lines of *source* (see open_source), without their line endings."""
+    return chain.from_iterable(_line_chunks(source, chunk_size, encoding))
+
+
+def _token_chunks(
+    source: str | Path | BinaryIO | None, chunk_size: int, encoding: str
+) -> Iterator[list[str]]:
+    return _split_tokens(_chunks(source, chunk_size, encoding))
+
+
+def _split_tokens(texts: Iterable[str]) -> Iterator[list[str]]:
+    """The tokens of consecutive pieces of text, one list per piece."""
+    rest = ""
+    for text in texts:
+        tokens = (rest + text).split()
+        # A token running up to the end of the chunk may continue in the next
+        rest = tokens.pop() if tokens and not text[-1:].isspace() else ""
+        yield tokens
+    if rest:
+        yield [rest]
+
+
+def read_tokens(
+    source: str | Path | BinaryIO | None = None,
+    *,
+    chunk_size: int = _BUFFER_SIZE,
+    encoding: str = "utf-8",
+) -> Iterator[str]:
+    """Whitespace-separated tokens of *source* (see open_source)."""
+    return chain.from_iterable(_token_chunks(source, chunk_size, encoding))
+
+
+def read_ints(
+    source: str | Path | BinaryIO | None = None,
+    *,
+    chunk_size: int = _BUFFER_SIZE,
+) -> Iterator[int]:
+    """Tokens of *source* parsed as integers; raises ValueError on others."""
+    # chain and map keep the per-token work in C
+    chunks = _token_chunks(source, chunk_size, "utf-8")
+    return chain.from_iterable(map(partial(map, int), chunks))
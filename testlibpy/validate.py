@@ -0,0 +1,224 @@
+"""
+Strict input reading for input validators.
+
+An InputReader reads the whole input at once (memory-mapped when stdin is a
+file) and checks its exact format as it goes: single spaces between tokens,
+"\\n" line endings, canonical integers (no "+", "-0" or leading zeros), and
+nothing after the end. Any violation raises ValidationError, an
+AssertionError that gives the line and column where the input went wrong:
+
+    from testlibpy.validate import InputReader
+
+    inf = InputReader()
+    n = inf.read_int(2, 10**5, "n")
+    inf.read_eoln()
+    a = inf.read_ints(n, 1, 10**8, "a")
+    inf.read_eoln()
+    inf.read_eof()
+    assert len(set(a)) == n, "elements are not distinct"
+
+read_ints checks and converts a whole line of integers in one call to the
+json module's parser, and checks their range with min() and max(), instead
+of a Python-level loop per value.
+"""
+
+import json
+import mmap
+import os
+import re
+import stat
+import sys
+from pathlib import Path
+from typing import BinaryIO
+
+_TOKEN = re.compile(rb"[^ \t\r\n]+")
+_INT = re.compile(rb"(?:0|-?[1-9][0-9]*)")
+_FLOAT = re.compile(rb"-?(?:0|[1-9][0-9]*)(?:\.([0-9]+))?")
+
+
+class ValidationError(AssertionError):
+    """The input does not have the expected format."""
+
+
+def _parse_ints(run: bytes) -> list[int]:
+    """
+    The integers in *run* if it is canonical integers separated by single
+    spaces, else []. With commas for spaces that is a JSON array of integers
+    (JSON allows neither "+", leading zeros nor empty elements) except for
+    "-0", so the json module's parser checks and converts the whole run in
+    one pass, faster than int() token by token.
+    """
+    if run.translate(None, b"0123456789- ") or (b"-" in run and b"-0" in run):
+        return []
+    try:
+        return json.loads(b"[" + run.replace(b" ", b",") + b"]")
+    except ValueError:  # includes more digits than int() converts
+        return []
+
+
+def _max_length(lo: int | None, hi: int | None) -> int:
+    """
+    The length of the longest integer token in [*lo*, *hi*], sign included;
+    without both bounds, the most digits int() will convert.
+    """
+    if lo is None or hi is None:
+        return sys.get_int_max_str_digits() or sys.maxsize
+    return max(len(str(lo)), len(str(hi)))
+
+
+def _load(source: str | Path | BinaryIO | None):
+    """Bytes (or an mmap) of *source*: a path, binary file, or stdin if None."""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            return _load(f)
+    stream = sys.stdin.buffer if source is None else source
+    try:
+        fd = stream.fileno()
+        info = os.fstat(fd)
+    except (AttributeError, OSError, ValueError):
+        return stream.read()
+    if stat.S_ISREG(info.st_mode) and info.st_size > 0 and stream.tell() == 0:
+        return mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+    return stream.read()
+
+
+class InputReader:
+    """Reads tokens from *source* (a path, binary file, or stdin) strictly."""
+
+    def __init__(self, source: str | Path | BinaryIO | None = None):
+        self.data = _load(source)
+        self.pos = 0
+
+    def error(self, message: str, pos: int | None = None) -> ValidationError:
+        """A ValidationError for *message* at *pos* (default: the current
+        position), to raise for checks of your own."""
+        pos = self.pos if pos is None else pos
+        before = bytes(self.data[:pos])
+        line = before.count(b"\n") + 1
+        column = pos - before.rfind(b"\n")
+        return ValidationError(f"line {line}, column {column}: {message}")
+
+    def _describe(self, pos: int) -> str:
+        if pos >= len(self.data):
+            return "end of file"
+        match = _TOKEN.match(self.data, pos)
+        if match is None:
+            return repr(chr(self.data[pos]))
+        token = match.group()
+        return repr(token[:20].decode(errors="replace") + "..." * (len(token) > 20))
+
+    def read_token(self, pattern: str | None = None, name: str = "token") -> str:
+        """
+        The next token (a run of characters other than spaces, tabs and line
+        endings), which must fully match the regular expression *pattern*
+        if given.
+        """
+        match = _TOKEN.match(self.data, self.pos)
+        if match is None:
+            raise self.error(f"expected {name}, found {self._describe(self.pos)}")
+        token = match.group().decode(errors="replace")
+        if pattern is not None and re.fullmatch(pattern, token) is None:
+            raise self.error(f"{name}={token!r} does not match {pattern!r}")
+        self.pos = match.end()
+        return token
+
+    def read_int(
+        self, lo: int | None = None, hi: int | None = None, name: str = "integer"
+    ) -> int:
+        """The next token as an integer, which must be in [*lo*, *hi*]."""
+        match = _INT.match(self.data, self.pos)
+        if match is None or _TOKEN.match(self.data, match.end()):
+            raise self.error(f"expected {name}, found {self._describe(self.pos)}")
+        length = match.end() - match.start()
+        if length > _max_length(lo, hi):
+            # Out of range (or too long for int()) without converting it
+            token = self._describe(self.pos)
+            if lo is None or hi is None:
+                raise self.error(f"{name}={token} has too many digits ({length})")
+            raise self.error(f"{name}={token} is not in [{lo}, {hi}]")
+        value = int(match.group())
+        if (lo is not None and value < lo) or (hi is not None and value > hi):
+            raise self.error(f"{name}={value} is not in [{lo}, {hi}]")
+        self.pos = match.end()
+        return value
+
+    def read_ints(
+        self,
+        n: int,
+        lo: int | None = None,
+        hi: int | None = None,
+        name: str = "integers",
+    ) -> list[int]:
+        """
+        *n* integers separated by single spaces, each in [*lo*, *hi*]. The
+        reader is left after the last one.
+        """
+        if n <= 0:
+            return []
+        end = self.data.find(b"\n", self.pos)
+        run = self.data[self.pos : len(self.data) if end < 0 else end]
+        spaces = run.count(b" ")
+        if spaces >= n:  # only the first n tokens of the line
+            run = run[: len(run) - len(run.split(b" ", n)[n]) - 1]
+        values = _parse_ints(run) if spaces >= n - 1 else []
+        if len(values) == n:
+            if (lo is None or min(values) >= lo) and (hi is None or max(values) <= hi):
+                self.pos += len(run)
+                return values
+        # Read them one at a time to report where exactly the input is wrong
+        values = []
+        for i in range(n):
+            if i:
+                self.read_space()
+            values.append(self.read_int(lo, hi, f"{name}[{i}]"))
+        return values
+
+    def read_float(
+        self,
+        lo: float | None = None,
+        hi: float | None = None,
+        name: str = "number",
+        max_decimals: int | None = None,
+    ) -> float:
+        """
+        The next token as a fixed-point number (no exponent) in [*lo*, *hi*]
+        with at most *max_decimals* digits after the point.
+        """
+        match = _FLOAT.match(self.data, self.pos)
+        if match is None or _TOKEN.match(self.data, match.end()):
+            raise self.error(f"expected {name}, found {self._describe(self.pos)}")
+        decimals = match.group(1)
+        if max_decimals is not None and decimals and len(decimals) > max_decimals:
+            raise self.error(f"{name} has more than {max_decimals} decimals")
+        value = float(match.group())
+        if (lo is not None and value < lo) or (hi is not None and value > hi):
+            raise self.error(f"{name}={match.group().decode()} is not in [{lo}, {hi}]")
+        self.pos = match.end()
+        return value
+
+    def _expect(self, char: bytes, what: str) -> None:
+        if self.data[self.pos : self.pos + 1] != char:
+            raise self.error(f"expected {what}, found {self._describe(self.pos)}")
+        self.pos += 1
+
+    def read_space(self) -> None:
+        """Exactly one space."""
+        self._expect(b" ", "a space")
+
+    def read_eoln(self) -> None:
+        """The end of the line: a single "\\n"."""
+        self._expect(b"\n", "end of line")
+
+    def read_eof(self) -> None:
+        """The end of the input; nothing may follow."""
+        if self.pos != len(self.data):
+            raise self.error(f"expected end of file, found {self._describe(self.pos)}")
+
+    def read_line(self) -> str:
+        """The rest of the line, as is, consuming its "\\n"."""
+        end = self.data.find(b"\n", self.pos)
+        if end < 0:
+            raise self.error("expected end of line, found end of file", len(self.data))
+        line = bytes(self.data[self.pos : end]).decode(errors="replace")
+        self.pos = end + 1
+        return line